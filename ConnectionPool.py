@@ -0,0 +1,144 @@
+import os
+import time
+import yaml
+import threading
+import mysql.connector
+import mysql.connector.pooling
+from contextlib import contextmanager
+from typing import Protocol
+
+
+class Logger(Protocol):
+    def log(self, message:str, level:str, *args, **context):
+        pass
+
+
+class ConnectionPool:
+    # single provider of MySQL connections for DBHandler, DBPopulator and TableInitializer
+    # credentials are read from keyring once, connections are borrowed with get_connection()
+    # and returned to the pool by calling close() on them (or by using connection() context manager)
+    _instances = {}
+    _instances_lock = threading.Lock()
+    db_namespace = "DB"
+
+    @classmethod
+    def get(cls, logger:Logger, rdir:str) -> "ConnectionPool":
+        # one pool per root dir (config file) for the whole process
+        with cls._instances_lock:
+            if rdir not in cls._instances:
+                cls._instances[rdir] = cls(logger, rdir)
+            return cls._instances[rdir]
+
+    def __init__(self, logger:Logger, rdir:str) -> None:
+        self._root_dir = rdir
+        self.l = logger
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+        system = os.name
+        if system == "nt":
+            import keyring as kr
+        elif system == "posix":
+            import keyring as kr
+            from keyrings.cryptfile.cryptfile import CryptFileKeyring
+            krcrypt = CryptFileKeyring()
+            krcrypt.keyring_key = os.getenv('KRCRYPT_PASS')
+            kr.set_keyring(krcrypt)
+
+        config_file = os.path.join(self._root_dir, "settings", "config.yaml")
+
+        with open(config_file, 'r') as file:
+            config = yaml.load(file, yaml.SafeLoader)
+            credentials:dict = config['credentials']
+            db_creds:dict = credentials['database']
+            pool_config:dict = config['options'].get('db_pool', {})
+
+        self.pool_size = pool_config.get('size', 2)
+        self.attempts = pool_config.get('attempts', 5)
+        self.backoff = pool_config.get('backoff', 0.5)
+
+        # get obscured login data, stored in keyring
+        self.host = db_creds['host']  # host data stored plain in config file
+        self.user = kr.get_password(self.db_namespace, db_creds['user'])
+        self.password = kr.get_password(self.db_namespace, db_creds['password'])
+        self.database = kr.get_password(self.db_namespace, db_creds['database'])
+
+        self.l.log("Connection pool configured, size %s", "DEBUG", self.pool_size)
+
+    def _create_pool(self) -> None:
+        self.l.log("Creating database connection pool", "DEBUG")
+        self._pool = mysql.connector.pooling.MySQLConnectionPool(
+            pool_name=f"jirascrapper_{id(self)}",
+            pool_size=self.pool_size,
+            pool_reset_session=True,
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            database=self.database,
+            use_unicode=True,
+            charset="utf8"
+        )
+
+    def get_connection(self) -> mysql.connector.pooling.PooledMySQLConnection:
+        # borrow healthy connection - broken ones are reconnected, failures are retried with exponential backoff
+        # ProgrammingError (bad credentials, missing database) is raised right away, as retrying won't help
+        delay = self.backoff
+
+        for attempt in range(1, self.attempts + 1):
+            connection = None
+            try:
+                with self._pool_lock:
+                    if self._pool is None:
+                        self._create_pool()
+
+                connection = self._pool.get_connection()
+                # health check, reconnects connection which was dropped by the server while idle in the pool
+                connection.ping(reconnect=True, attempts=1, delay=0)
+                return connection
+
+            except mysql.connector.errors.ProgrammingError:
+                self._release(connection)
+                raise
+
+            except mysql.connector.Error as merr:
+                # connection which failed the health check goes back to the pool, otherwise the pool runs dry
+                self._release(connection)
+                if attempt == self.attempts:
+                    self.l.log("Couldn't get database connection after %s attempts", "ERROR", attempt)
+                    raise
+
+                self.l.log("Database connection attempt %s failed: '%s', retrying in %ss", "WARNING", attempt, merr, delay)
+                time.sleep(delay)
+                delay *= 2
+
+    def _release(self, connection) -> None:
+        # pool reconnects returned connection on the next checkout
+        if connection is None:
+            return
+        try:
+            connection.close()
+        except mysql.connector.Error:
+            # session reset of broken connection fails, connection is returned to the pool anyway
+            pass
+
+    @contextmanager
+    def connection(self):
+        connection = self.get_connection()
+        try:
+            yield connection
+        finally:
+            # returns connection to the pool
+            connection.close()
+
+    def server_connection(self) -> mysql.connector.MySQLConnection:
+        # connection without selected database, only needed when database itself has to be created
+        return mysql.connector.connect(
+            host=self.host,
+            user=self.user,
+            password=self.password
+        )
+
+    def reset(self) -> None:
+        # drop the pool, next get_connection() creates it again (ex. after the database was created)
+        with self._pool_lock:
+            self._pool = None
@@ -1,22 +1,120 @@
 import os
+import sys
+import time
 import yaml
-import keyring as kr
+import hashlib
+from array import array
 import mysql.connector
-from typing import Protocol
+from typing import Protocol, Callable
+from datetime import datetime
+from collections import namedtuple, OrderedDict
+from ConnectionPool import ConnectionPool
 
 
 class Logger(Protocol):
-    def log(self, message:str, level:str):
+    def log(self, message:str, level:str, *args, **context):
         pass
 
 
+# lightweight record of Issues table row, same field names as dicts returned by DBHandler
+IssueRow = namedtuple("IssueRow", ["id", "key", "type", "channel", "testerID", "projectID", "time", "softwareVersion"])
+
+
+class IssueColumns:
+    # columnar result of issues query - numeric columns in arrays (NULL IDs stored as -1),
+    # repeating string columns interned, so equal values share one object
+    columns = IssueRow._fields
+
+    def __init__(self) -> None:
+        self.id = array('l')
+        self.key = []
+        self.type = []
+        self.channel = []
+        self.testerID = array('l')
+        self.projectID = array('l')
+        self.time = array('f')
+        self.softwareVersion = []
+
+    @staticmethod
+    def _intern(value):
+        return sys.intern(value) if isinstance(value, str) else value
+
+    def append(self, issue_tuple:tuple) -> None:
+        self.id.append(issue_tuple[0])
+        self.key.append(issue_tuple[1])
+        self.type.append(self._intern(issue_tuple[2]))
+        self.channel.append(self._intern(issue_tuple[3]))
+        self.testerID.append(issue_tuple[4] if issue_tuple[4] is not None else -1)
+        self.projectID.append(issue_tuple[5] if issue_tuple[5] is not None else -1)
+        self.time.append(issue_tuple[6] if issue_tuple[6] is not None else 0.0)
+        self.softwareVersion.append(self._intern(issue_tuple[7]))
+
+    def column(self, name:str):
+        return getattr(self, name)
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+
+class IssueCache:
+    # bounded LRU cache of issue lookups (TestKey -> row dict, or None for keys known to be missing)
+    # entries expire after ttl seconds, write paths have to invalidate keys they touch
+
+    def __init__(self, max_entries:int=10000, ttl:int=3600) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, key:str) -> tuple:
+        # returns (found in cache, cached value)
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            self.stats["misses"] += 1
+            return False, None
+
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return True, entry[1]
+
+    def put(self, key:str, value:dict) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def invalidate(self, keys) -> None:
+        for key in keys:
+            if self._entries.pop(key, None) is not None:
+                self.stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 class DBHandler:
     errors = {}
+    # columns are always listed explicitly, so rows keep their shape when new columns are migrated in
+    issue_columns = "issues.TestID, issues.TestKey, issues.TestType, issues.DistChannel, " \
+                    "issues.TesterID, issues.ProjectID, issues.Time, issues.SoftwareVersion"
 
-    def __init__(self, logger:Logger, rdir:str) -> None:
+    # tables created by TableInitializer (listed in config), whose absence is not an error -
+    # without timesummary, time summaries are aggregated from AnalysisView
+    optional_tables = {"timesummary"}
+
+    # fixed statements executed in tight loops - prepared on the server once per connection
+    hot_statements = {
+        "issue_by_key": f"SELECT {issue_columns} FROM issues WHERE TestKey = %s ORDER BY TestID"
+    }
+
+    def __init__(self, logger:Logger, rdir:str, cache:bool=None) -> None:
         self._root_dir = rdir
         self.l = logger
-        self.db_namespace = "DB"
 
         self.l.log("Initializing DataBase Connector class", "DEBUG")
 
@@ -29,38 +127,83 @@ class DBHandler:
 
         with open(config_file, 'r') as file:
             config = yaml.load(file, yaml.SafeLoader)
-            credentials:dict = config['credentials']
-            db_creds:dict = credentials['database']
-            host = db_creds['host']
-            user = db_creds['user']
-            password = db_creds['password']
-            database = db_creds['database']
-
             self.tables:set = set(config['tables'])
-
-        self.connector = self._establish_connection(host, user, password, database)
+            self.batch_size:int = config['options'].get('db_batch_size', 500)
+            cache_config:dict = config['options'].get('issue_cache', {})
+
+        # lookup cache can be switched off (config or cache=False) when debugging correctness
+        if cache is None:
+            cache = cache_config.get('enabled', True)
+        self.cache = None
+        if cache:
+            self.cache = IssueCache(max_entries=cache_config.get('size', 10000), ttl=cache_config.get('ttl', 3600))
+
+        # connection is borrowed from the process-wide pool, shared with other database components
+        self.pool = ConnectionPool.get(self.l, self._root_dir)
+        self.summary_table = False
+        self._prepared = {}
+        self._prepared_connection = None
+        self.connector = self._establish_connection()
         if self.connector is not None:
             self.cursor = self.connector.cursor()
             self._check_tables()
     
-    def _establish_connection(self, host, user, password, database) -> mysql.connector.MySQLConnection:
+    def _establish_connection(self) -> mysql.connector.MySQLConnection:
         self.l.log("Establishing connection", "DEBUG")
 
         try:
-            mysql_db = mysql.connector.connect(
-                host = host,
-                user = kr.get_password(self.db_namespace, user),
-                password = kr.get_password(self.db_namespace, password),
-                database = kr.get_password(self.db_namespace, database)
-            )
+            mysql_db = self.pool.get_connection()
             self.l.log("Connection correctly established", "DEBUG")
             return mysql_db
         
-        except mysql.connector.errors.ProgrammingError as perr:
+        except mysql.connector.Error as perr:
             self.errors["connection"] = 3201
-            self.l.log("Connection not achieved", "ERROR")
-            self.l.log(f"Error message: '{perr}'")
+            self.l.log("Connection not achieved", "ERROR", code=3201)
+            self.l.log("Error message: '%s'", "RUN", perr)
             return None
+
+    def close(self) -> None:
+        # return the connection to the pool
+        if self.connector is not None:
+            self._drop_prepared()
+            self.cursor.close()
+            self.connector.close()
+            self.connector = None
+
+    def _drop_prepared(self) -> None:
+        for cursor in self._prepared.values():
+            try:
+                cursor.close()
+            except mysql.connector.Error:
+                # statement died together with the old connection
+                pass
+        self._prepared = {}
+
+    def _execute_prepared(self, name:str, params:tuple) -> list:
+        # execute one of hot_statements through its own prepared cursor; statements are re-prepared
+        # transparently when the connection was replaced or reconnected (new connection id)
+        for attempt in range(2):
+            connection_id = self.connector.connection_id
+            if connection_id != self._prepared_connection:
+                self._drop_prepared()
+                self._prepared_connection = connection_id
+
+            cursor = self._prepared.get(name)
+            if cursor is None:
+                self.l.log("Preparing statement %s on connection %s", "DEBUG", name, connection_id)
+                cursor = self.connector.cursor(prepared=True)
+                self._prepared[name] = cursor
+
+            try:
+                cursor.execute(self.hot_statements[name], params)
+                return cursor.fetchall()
+
+            except (mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError) as merr:
+                if attempt > 0:
+                    raise
+                self.l.log("Prepared statement %s failed: '%s', reconnecting", "WARNING", name, merr)
+                self.connector.ping(reconnect=True, attempts=3, delay=1)
+                self._drop_prepared()
     
     def _check_tables(self):
         self.l.log("Checking if correct tables exist", "DEBUG")
@@ -71,14 +214,21 @@ class DBHandler:
         for out_tuple in self.cursor:
             found_tables.add(out_tuple[0])
 
-        self.tables -= found_tables
+        found_lower = {table.lower() for table in found_tables}
+        self.summary_table = "timesummary" in found_lower
+        if not self.summary_table:
+            self.l.log("Summary table not present, run init_database_tables.py to create it - "
+                       "summaries will be aggregated from AnalysisView", "WARNING")
+
+        self.tables = {table for table in self.tables
+                       if table.lower() not in found_lower and table.lower() not in self.optional_tables}
         
         if len(self.tables) == 0:
             self.l.log("All necessary tables present", "DEBUG")
             return True
         else:
             self.errors["tables"] = 3301
-            self.l.log(f"Tables {self.tables} not present!", "ERROR")
+            self.l.log("Tables %s not present!", "ERROR", self.tables, code=3301)
             return False
 
     def _add_error(self, issueKey:str, errorCode):
@@ -88,99 +238,515 @@ class DBHandler:
         if errorCode not in self.errors[issueKey]:
             self.errors[issueKey].append(errorCode)
 
-    def _check_issue_existence(self, issue_key) -> dict:
-        query = f'''SELECT COUNT(1) FROM issues WHERE TestKey=%s
-                                UNION
-                                SELECT TestKey FROM issues WHERE TestKey=%s'''
-        self.cursor.execute(query, (issue_key, issue_key))
-
-        query_return = []
+    @staticmethod
+    def _row_to_dict(issue_tuple:tuple) -> dict:
+        # FLOAT column comes back widened over prepared (binary protocol) statements, ex. 1.100000023841858,
+        # rounded to the 1 decimal digit it is stored with, so text and binary lookups return the same value
+        time = issue_tuple[6]
+        if time is not None:
+            time = round(float(time), 1)
+
+        return {
+            'id': issue_tuple[0],
+            'key': issue_tuple[1],
+            'type': issue_tuple[2],
+            'channel': issue_tuple[3],
+            'testerID': issue_tuple[4],
+            'projectID': issue_tuple[5],
+            'time': time,
+            'softwareVersion': issue_tuple[7]
+        }
+
+    def get_issues_info(self, keys:list, chunk_size:int=500) -> dict:
+        # resolve many keys with one "WHERE TestKey IN (...)" query per chunk,
+        # keys found more than once are reported as duplicates (3401)
+        keys = list(dict.fromkeys(keys))
+        self.l.log("Starting to gather info of %s issues from database", "DEBUG", len(keys))
         result = {}
-        for x in self.cursor:
-            query_return.append(*x)
-
-        if int(query_return[0]) == 1:
-            result["found"] = True
-            result["key"] = query_return[1]
-        elif int(query_return[0]) > 1:
-            result["found"] = True
-            result["key"] = query_return[1]
-            self._add_error(query_return[1], 3401)
 
+        if self.cache is not None:
+            uncached = []
+            for key in keys:
+                cached, value = self.cache.get(key)
+                if not cached:
+                    uncached.append(key)
+                elif value is not None:
+                    result[key] = dict(value)
+            self.l.log("%s issues read from lookup cache", "DEBUG", len(keys) - len(uncached))
+            keys = uncached
+
+        from_cache = len(result)
+
+        if len(keys) == 1:
+            # single key lookup is the hot path, served by prepared statement
+            for issue_tuple in self._execute_prepared("issue_by_key", (keys[0],)):
+                if keys[0] in result:
+                    self._add_error(keys[0], 3401)
+                else:
+                    result[keys[0]] = self._row_to_dict(issue_tuple)
+            keys_to_query = []
         else:
-            result["found"] = False
-            result["key"] = None
-        
+            keys_to_query = keys
+
+        for i in range(0, len(keys_to_query), chunk_size):
+            chunk = keys_to_query[i:i + chunk_size]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            query = f'''SELECT {self.issue_columns} FROM issues WHERE TestKey IN ({placeholders}) ORDER BY TestID'''
+            self.cursor.execute(query, chunk)
+
+            for issue_tuple in self.cursor.fetchall():
+                issue_key = issue_tuple[1]
+                if issue_key in result:
+                    self._add_error(issue_key, 3401)
+                else:
+                    # first (oldest) row is returned for duplicated keys
+                    result[issue_key] = self._row_to_dict(issue_tuple)
+
+        if self.cache is not None:
+            # missing keys are cached as well, until written or expired
+            for key in keys:
+                value = result.get(key)
+                self.cache.put(key, dict(value) if value is not None else None)
+
+        self.l.log("%s of %s issues found in the database", "DEBUG", len(result) - from_cache, len(keys))
         return result
 
-    def get_single_issue_info(self, issueKey):
-        self.l.log(f"Starting to gather info of issue {issueKey} from database", "DEBUG")
-        exists = self._check_issue_existence(issueKey)
-        query = f'''SELECT * FROM issues WHERE TestKey=%s LIMIT 0, 1'''
-
-        if exists.get("found") == True:
-            self.l.log(f"Issue {issueKey} found in the database", "RUN")
-            self.cursor.execute(query, (issueKey,))
-            result = self.cursor.fetchone()
-            result_dict = {
-                'id': result[0],
-                'key': result[1],
-                'type': result[2],
-                'channel': result[3],
-                'testerID': result[4],
-                'projectID': result[5],
-                'time': result[6],
-                'softwareVersion': result[7]
-            }
+    def cache_stats(self) -> dict:
+        if self.cache is None:
+            return None
+        return dict(self.cache.stats, entries=len(self.cache))
+
+    def _check_issue_existence(self, issue_key) -> dict:
+        found = self.get_issues_info([issue_key])
+
+        if issue_key in found:
+            return {"found": True, "key": issue_key}
+        else:
+            return {"found": False, "key": None}
+
+    def get_single_issue_info(self, issueKey, row_format:str="dict"):
+        # issue is returned as dict (default) or as compact IssueRow record ("record")
+        self.l.log("Starting to gather info of issue %s from database", "DEBUG", issueKey)
+        result_dict = self.get_issues_info([issueKey]).get(issueKey)
+
+        if result_dict is not None:
+            self.l.log("Issue %s found in the database", "RUN", issueKey)
+            if row_format == "record":
+                return IssueRow(**result_dict)
             return result_dict
         
         else:
-            self.l.log(f"Issue {issueKey} not found in the database", "RUN")
+            self.l.log("Issue %s not found in the database", "RUN", issueKey)
             return None
 
-    def get_all_project_issues_info(self, project_key:str=None, project_id:int=None):
-        self.l.log(f"Starting to gather all issues of project (key:{project_key}, id:{project_id}) from database", "DEBUG")
-        return_list = []
+    def get_all_project_issues_info(self, project_key:str=None, project_id:int=None, row_format:str="dict"):
+        # issues are returned as list of dicts (default), list of IssueRow records ("record")
+        # or as single IssueColumns object holding per-column arrays ("columnar")
+        self.l.log("Starting to gather all issues of project (key:%s, id:%s) from database", "DEBUG", project_key, project_id)
 
         if project_key is not None:
-            query = f'''SELECT * FROM issues WHERE INSTR(TestKey, %s) > 0'''
+            # resolved through indexed project key, substring match on TestKey would scan the whole table
+            query = f'''SELECT {self.issue_columns} FROM issues
+                        JOIN projects ON projects.ProjectID = issues.ProjectID
+                        WHERE projects.ProjectKey = %s'''
             self.cursor.execute(query, (project_key,))
             result_list:list = self.cursor.fetchall()
             if len(result_list) < 1:
-                self.l.log(f"No issues found for project key:{project_key}", "ERROR")
+                self.l.log("No issues found for project key:%s", "ERROR", project_key, project=project_key, code=3601)
                 self._add_error(project_key, 3601)
                 return None
 
         elif project_id is not None:
-            query = f'''SELECT * FROM issues WHERE ProjectID = %s'''
+            query = f'''SELECT {self.issue_columns} FROM issues WHERE ProjectID = %s'''
             self.cursor.execute(query, (project_id, ))
             result_list:list = self.cursor.fetchall()
             if len(result_list) < 1:
-                self.l.log(f"No issues found for project id:{project_id}", "ERROR")
+                self.l.log("No issues found for project id:%s", "ERROR", project_id, code=3602)
                 self._add_error(project_id, 3602)
                 return None
 
         else:
-            self.l.log(f"No project with key:{project_key}/id:{project_id} found in the database", "CRITICAL")
+            self.l.log("No project with key:%s/id:%s found in the database", "CRITICAL", project_key, project_id,
+                       project=project_key, code=3603)
             self._add_error("Unknown", 3603)
             return None
 
-        for issue_tuple in result_list:
-            result_dict = {
-                'id': issue_tuple[0],
-                'key': issue_tuple[1],
-                'type': issue_tuple[2],
-                'channel':issue_tuple[3],
-                'testerID': issue_tuple[4],
-                'projectID': issue_tuple[5],
-                'time': issue_tuple[6],
-                'softwareVersion': issue_tuple[7]
-            }
-            return_list.append(result_dict)
+        match row_format:
+            case "record":
+                return_list = [IssueRow._make(issue_tuple) for issue_tuple in result_list]
+            case "columnar":
+                return_list = IssueColumns()
+                for issue_tuple in result_list:
+                    return_list.append(issue_tuple)
+            case _:
+                return_list = [self._row_to_dict(issue_tuple) for issue_tuple in result_list]
         
-        self.l.log(f"{len(return_list)} issues found in the database for project key:{project_key}\id:{project_id}", "RUN")
+        self.l.log("%s issues found in the database for project key:%s/id:%s", "RUN", len(return_list), project_key, project_id)
         return return_list
 
+    def _load_id_maps(self) -> tuple:
+        # map testers (by username and by full name, as returned by Jira) and project keys to their IDs
+        tester_ids = {}
+        self.cursor.execute("SELECT TesterID, Username, Name, Surname FROM testers")
+        for tester_id, username, name, surname in self.cursor.fetchall():
+            tester_ids[username] = tester_id
+            tester_ids[f"{name} {surname}"] = tester_id
+
+        self.cursor.execute("SELECT ProjectID, ProjectKey FROM projects")
+        project_ids = {project_key: project_id for project_id, project_key in self.cursor.fetchall()}
+
+        return tester_ids, project_ids
+
+    @staticmethod
+    def _issue_rows(batch):
+        # rows in IssueBatch column order - (key, test_type, channel, tester, time, version)
+        if hasattr(batch, "rows"):
+            return batch.rows()
+        return (tuple(issue.get_specs().values()) if hasattr(issue, "get_specs") else tuple(issue) for issue in batch)
+
+    @staticmethod
+    def content_hash(row:tuple, tester_id:int, project_id:int) -> str:
+        # stable hash of the issue row as it is written - scraped data (time rounded as it is gathered)
+        # and resolved tester/project IDs, so a row written with unknown (NULL) tester or project
+        # is rewritten once they are seeded
+        key, test_type, channel, tester, issue_time, version = row
+        content = "\x1f".join((str(test_type), str(channel), str(tester), f"{float(issue_time):.1f}", str(version),
+                               str(tester_id), str(project_id)))
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def _row_hash(cls, row:tuple, id_maps:tuple) -> str:
+        tester_ids, project_ids = id_maps
+        return cls.content_hash(row, tester_ids.get(row[3]), project_ids.get(row[0].rsplit("-", 1)[0]))
+
+    def upsert_issues(self, batch, batch_size:int=None, id_maps:tuple=None) -> int:
+        # write issues (IssueBatch, iterable of TestTypeIssue or of row tuples) with multi-row
+        # INSERT ... ON DUPLICATE KEY UPDATE, relying on unique TestKey index - one statement and one commit per batch
+        # summary groups of written issues are refreshed afterwards
+        rows = list(self._issue_rows(batch))
+        return self._refreshing_summary([row[0] for row in rows],
+                                        lambda: self._write_issues(rows, batch_size, id_maps))
+
+    def _refreshing_summary(self, keys:list, write:Callable) -> int:
+        # run write of given issues and refresh summary groups they belong to before and after it
+        if not self.summary_table:
+            return write()
+
+        groups = self._affected_groups(keys)
+        count = write()
+        if count > 0:
+            groups |= self._affected_groups(keys)
+            self.refresh_summary(groups)
+        return count
+
+    def _write_issues(self, batch, batch_size:int=None, id_maps:tuple=None) -> int:
+        if batch_size is None:
+            batch_size = self.batch_size
+
+        self.l.log("Starting upsert of %s issues, batch size %s", "DEBUG", len(batch), batch_size)
+        if id_maps is None:
+            id_maps = self._load_id_maps()
+        tester_ids, project_ids = id_maps
+
+        query = f'''INSERT INTO issues (TestKey, TestType, DistChannel, TesterID, ProjectID, Time, SoftwareVersion, ContentHash)
+                        VALUES {{}}
+                        ON DUPLICATE KEY UPDATE TestType=VALUES(TestType), DistChannel=VALUES(DistChannel),
+                        TesterID=VALUES(TesterID), ProjectID=VALUES(ProjectID), Time=VALUES(Time),
+                        SoftwareVersion=VALUES(SoftwareVersion), ContentHash=VALUES(ContentHash)'''
+        written = 0
+        values = []
+
+        def write(values:list) -> int:
+            count = len(values) // 8
+            if self.cache is not None:
+                # every 8th value is TestKey
+                self.cache.invalidate(values[0::8])
+            try:
+                self.cursor.execute(query.format(", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * count)), values)
+                self.connector.commit()
+                return count
+            except mysql.connector.Error as merr:
+                self.connector.rollback()
+                self._add_error("upsert", 3701)
+                self.l.log("Batch of %s issues not written: '%s'", "ERROR", count, merr, code=3701)
+                return 0
+
+        for row in self._issue_rows(batch):
+            key, test_type, channel, tester, issue_time, version = row
+            tester_id = tester_ids.get(tester)
+            project_id = project_ids.get(key.rsplit("-", 1)[0])
+            values.extend((key, test_type, channel, tester_id, project_id,
+                           issue_time, version, self.content_hash(row, tester_id, project_id)))
+
+            if len(values) >= batch_size * 8:
+                written += write(values)
+                values = []
+
+        if len(values) > 0:
+            written += write(values)
+
+        self.l.log("%s issues written to the database", "RUN", written)
+        return written
+
+    def get_content_hashes(self, project_key:str) -> dict:
+        query = f'''SELECT TestKey, ContentHash FROM issues WHERE TestKey LIKE %s'''
+        self.cursor.execute(query, (project_key.replace("_", "\\_") + "-%",))
+        return {issue_key: content_hash for issue_key, content_hash in self.cursor.fetchall()}
+
+    def diff_issues(self, batch, project_key:str, detect_deletes:bool=False, id_maps:tuple=None) -> dict:
+        # compare scraped issues of the project with content hashes stored in the database,
+        # deletions make sense only when batch holds the whole project (full sync)
+        if id_maps is None:
+            id_maps = self._load_id_maps()
+        stored = self.get_content_hashes(project_key)
+        diff = {"insert": [], "update": [], "delete": []}
+        seen = set()
+
+        for row in self._issue_rows(batch):
+            key = row[0]
+            seen.add(key)
+            stored_hash = stored.get(key, False)
+
+            if stored_hash is False:
+                diff["insert"].append(row)
+            elif stored_hash != self._row_hash(row, id_maps):
+                diff["update"].append(row)
+
+        if detect_deletes:
+            diff["delete"] = [key for key in stored if key not in seen]
+
+        self.l.log("Project %s: %s new, %s changed, %s removed, %s unchanged issues", "RUN",
+                   project_key, len(diff['insert']), len(diff['update']), len(diff['delete']),
+                   len(seen) - len(diff['insert']) - len(diff['update']))
+        return diff
+
+    def sync_issues(self, batch, project_key:str, delete_missing:bool=False) -> dict:
+        # write only issues which are new or whose content changed,
+        # summary groups touched by those issues (before and after the write) are refreshed afterwards
+        # tester and project IDs are part of the hash, resolved once for diff and write
+        id_maps = self._load_id_maps()
+        diff = self.diff_issues(batch, project_key, detect_deletes=delete_missing, id_maps=id_maps)
+        changed = diff["insert"] + diff["update"]
+        changed_keys = [row[0] for row in changed]
+
+        groups = set()
+        if self.summary_table:
+            groups = self._affected_groups(changed_keys + diff["delete"])
+
+        written = self._write_issues(changed, id_maps=id_maps) if len(changed) > 0 else 0
+        deleted = self._delete_issues(diff["delete"]) if len(diff["delete"]) > 0 else 0
+
+        if self.summary_table and (written > 0 or deleted > 0):
+            groups |= self._affected_groups(changed_keys)
+            self.refresh_summary(groups)
+
+        return {"written": written, "deleted": deleted, "diff": diff}
+
+    def _affected_groups(self, keys:list, chunk_size:int=500) -> set:
+        # summary groups (project, version, channel, tester) the given issues currently belong to
+        groups = set()
+
+        for i in range(0, len(keys), chunk_size):
+            chunk = keys[i:i + chunk_size]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            query = f'''SELECT DISTINCT ProjectID, SoftwareVersion, DistChannel, TesterID
+                        FROM issues WHERE TestKey IN ({placeholders})'''
+            self.cursor.execute(query, chunk)
+            groups.update(self.cursor.fetchall())
+
+        return groups
+
+    def refresh_summary(self, groups:set, chunk_size:int=200) -> None:
+        # recompute totals of given groups only - NULL-safe comparison, as tester/project can be unknown
+        groups = list(groups)
+        self.l.log("Refreshing %s summary groups", "DEBUG", len(groups))
+        condition = "(ProjectID <=> %s AND SoftwareVersion <=> %s AND DistChannel <=> %s AND TesterID <=> %s)"
+
+        try:
+            for i in range(0, len(groups), chunk_size):
+                chunk = groups[i:i + chunk_size]
+                conditions = " OR ".join([condition] * len(chunk))
+                params = [value for group in chunk for value in group]
+
+                self.cursor.execute(f"DELETE FROM timesummary WHERE {conditions}", params)
+                self.cursor.execute(f'''INSERT INTO timesummary (ProjectID, SoftwareVersion, DistChannel, TesterID, TotalTime, IssueCount)
+                                        SELECT ProjectID, SoftwareVersion, DistChannel, TesterID, SUM(Time), COUNT(1)
+                                        FROM issues WHERE {conditions}
+                                        GROUP BY ProjectID, SoftwareVersion, DistChannel, TesterID''', params)
+                self.connector.commit()
+
+        except mysql.connector.Error as merr:
+            self.connector.rollback()
+            self._add_error("summary", 3801)
+            self.l.log("Summary refresh failed: '%s'", "ERROR", merr, code=3801)
+
+    def rebuild_summary(self) -> None:
+        # full recomputation, ex. after manual changes in Issues table
+        self.l.log("Rebuilding summary table", "RUN")
+
+        try:
+            self.cursor.execute("DELETE FROM timesummary")
+            self.cursor.execute('''INSERT INTO timesummary (ProjectID, SoftwareVersion, DistChannel, TesterID, TotalTime, IssueCount)
+                                    SELECT ProjectID, SoftwareVersion, DistChannel, TesterID, SUM(Time), COUNT(1)
+                                    FROM issues GROUP BY ProjectID, SoftwareVersion, DistChannel, TesterID''')
+            self.connector.commit()
+
+        except mysql.connector.Error as merr:
+            self.connector.rollback()
+            self._add_error("summary", 3801)
+            self.l.log("Summary rebuild failed: '%s'", "ERROR", merr, code=3801)
+
+    # dimensions available for time summaries - (column in summary query, column in AnalysisView)
+    summary_dimensions = {
+        "product": ("projects.ProductID", "ProductID"),
+        "version": ("timesummary.SoftwareVersion", "SoftwareVersion"),
+        "channel": ("timesummary.DistChannel", "DistChannel"),
+        "tester": ("testers.Username", "Username")
+    }
+
+    def get_time_summary(self, group_by:tuple=("product", "version", "channel", "tester"), product:str=None) -> list:
+        # total time and number of issues per requested dimensions, read from summary table
+        # or aggregated from AnalysisView when summary table doesn't exist
+        unknown = [dimension for dimension in group_by if dimension not in self.summary_dimensions]
+        if len(group_by) == 0 or len(unknown) > 0:
+            self.l.log("Unknown summary dimensions: %s", "ERROR", unknown, code=3802)
+            self._add_error("summary", 3802)
+            return None
+
+        if self.summary_table:
+            columns = [self.summary_dimensions[dimension][0] for dimension in group_by]
+            product_column = "projects.ProductID"
+            query = f'''SELECT {", ".join(columns)}, SUM(timesummary.TotalTime), SUM(timesummary.IssueCount)
+                        FROM timesummary
+                        LEFT JOIN projects ON projects.ProjectID = timesummary.ProjectID
+                        LEFT JOIN testers ON testers.TesterID = timesummary.TesterID'''
+        else:
+            self.l.log("Summary table not present, aggregating AnalysisView", "WARNING")
+            columns = [self.summary_dimensions[dimension][1] for dimension in group_by]
+            product_column = "ProductID"
+            query = f'''SELECT {", ".join(columns)}, SUM(Time), COUNT(1) FROM AnalysisView'''
+
+        params = ()
+        if product is not None:
+            query += f" WHERE {product_column} = %s"
+            params = (product,)
+        query += f" GROUP BY {', '.join(columns)}"
+
+        self.cursor.execute(query, params)
+        result = []
+        for summary_tuple in self.cursor.fetchall():
+            summary = dict(zip(group_by, summary_tuple))
+            summary['time'] = summary_tuple[-2]
+            summary['count'] = summary_tuple[-1]
+            result.append(summary)
+
+        self.l.log("%s summary rows returned", "DEBUG", len(result))
+        return result
+
+    def iter_project_issues(self,
+                            project_key:str=None,
+                            project_id:int=None,
+                            fetch_size:int=500,
+                            row_format:str="dict"):
+        # stream issues of the project in batches of fetch_size rows instead of loading them all at once,
+        # rows are yielded as dicts (default), IssueRow records ("record") or plain tuples ("tuple")
+        # connection can't be used for other queries until the iteration is finished or closed
+        self.l.log("Starting to stream issues of project (key:%s, id:%s) from database", "DEBUG", project_key, project_id)
+
+        if project_key is not None:
+            query = f'''SELECT {self.issue_columns} FROM issues
+                        JOIN projects ON projects.ProjectID = issues.ProjectID
+                        WHERE projects.ProjectKey = %s'''
+            params = (project_key,)
+        elif project_id is not None:
+            query = f'''SELECT {self.issue_columns} FROM issues WHERE ProjectID = %s'''
+            params = (project_id,)
+        else:
+            self.l.log("No project with key:%s/id:%s found in the database", "CRITICAL", project_key, project_id,
+                       project=project_key, code=3603)
+            self._add_error("Unknown", 3603)
+            return
+
+        match row_format:
+            case "record":
+                convert = IssueRow._make
+            case "tuple":
+                convert = None
+            case _:
+                convert = self._row_to_dict
+
+        # unbuffered cursor - rows are read from the server only as they are fetched
+        cursor = self.connector.cursor(buffered=False)
+        streamed = 0
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if len(rows) == 0:
+                    break
+
+                streamed += len(rows)
+                for issue_tuple in rows:
+                    yield issue_tuple if convert is None else convert(issue_tuple)
+        finally:
+            # closing unbuffered cursor discards rows not read yet, so connection is usable again
+            cursor.close()
+            self.l.log("%s issues streamed from the database for project key:%s/id:%s", "RUN", streamed, project_key, project_id)
+
+    def get_watermark(self, project_key:str) -> dict:
+        self.l.log("Getting sync watermark of project %s", "DEBUG", project_key)
+        query = f'''SELECT LastUpdated, LastFullSync FROM watermarks WHERE ProjectKey=%s'''
+        self.cursor.execute(query, (project_key,))
+        result = self.cursor.fetchone()
+
+        if result is None:
+            self.l.log("No watermark stored for project %s", "DEBUG", project_key)
+            return None
+
+        return {'updated': result[0], 'fullSync': result[1]}
+
+    def set_watermark(self, project_key:str, updated:datetime, full_sync:bool=False) -> None:
+        # full_sync True marks finished full pass, None a full pass cut by the limit which continues
+        # from the watermark (LastFullSync is cleared), False keeps LastFullSync as it is
+        self.l.log("Setting sync watermark of project %s to %s (full sync: %s)", "DEBUG", project_key, updated, full_sync)
+
+        if full_sync:
+            query = f'''INSERT INTO watermarks (ProjectKey, LastUpdated, LastFullSync) VALUES (%s, %s, UTC_TIMESTAMP())
+                        ON DUPLICATE KEY UPDATE LastUpdated=VALUES(LastUpdated), LastFullSync=VALUES(LastFullSync)'''
+        elif full_sync is None:
+            query = f'''INSERT INTO watermarks (ProjectKey, LastUpdated, LastFullSync) VALUES (%s, %s, NULL)
+                        ON DUPLICATE KEY UPDATE LastUpdated=VALUES(LastUpdated), LastFullSync=NULL'''
+        else:
+            query = f'''INSERT INTO watermarks (ProjectKey, LastUpdated) VALUES (%s, %s)
+                        ON DUPLICATE KEY UPDATE LastUpdated=VALUES(LastUpdated)'''
+
+        self.cursor.execute(query, (project_key, updated))
+        self.connector.commit()
+
+    def delete_issues(self, keys:list, chunk_size:int=500) -> int:
+        # summary groups of deleted issues are refreshed afterwards
+        keys = list(keys)
+        return self._refreshing_summary(keys, lambda: self._delete_issues(keys, chunk_size))
+
+    def _delete_issues(self, keys:list, chunk_size:int=500) -> int:
+        self.l.log("Deleting %s issues from database", "DEBUG", len(keys))
+        keys = list(keys)
+        deleted = 0
+
+        if self.cache is not None:
+            self.cache.invalidate(keys)
+
+        for i in range(0, len(keys), chunk_size):
+            chunk = keys[i:i + chunk_size]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            query = f'''DELETE FROM issues WHERE TestKey IN ({placeholders})'''
+            self.cursor.execute(query, chunk)
+            deleted += self.cursor.rowcount
+
+        self.connector.commit()
+        self.l.log("%s issues deleted from database", "RUN", deleted)
+        return deleted
+
 
 #FIXME remove test after dev
 
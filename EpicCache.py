@@ -0,0 +1,126 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Protocol
+
+
+class Logger(Protocol):
+    def log(self, message:str, level:str, *args, **context):
+        pass
+
+
+class EpicCache:
+    # on-disk cache of raw epic payloads, keyed by epic key
+    # entries younger than ttl are served as they are, older ones are revalidated
+    # against the 'updated' timestamp of the epic, entries not used for max_age are evicted
+
+    def __init__(self,
+                 logger:Logger,
+                 rdir:str,
+                 ttl:int=24*3600,
+                 max_age:int=30*24*3600,
+                 max_entries:int=10000) -> None:
+        self._root_dir = rdir
+        self.l = logger
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+        cache_dir = os.path.join(self._root_dir, "cache")
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "epics.sqlite")
+
+        self.l.log("Opening epic cache %s", "DEBUG", self.path)
+
+        # cache is shared by concurrently scraped projects, access is serialized by self._lock
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute('''CREATE TABLE IF NOT EXISTS epics (
+                                EpicKey TEXT PRIMARY KEY,
+                                Updated TEXT,
+                                Raw TEXT,
+                                FetchedAt REAL,
+                                AccessedAt REAL)''')
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_epics_accessed ON epics (AccessedAt)")
+        self.db.commit()
+
+    def get_many(self, keys:list) -> tuple:
+        # returns dict of fresh raw payloads and dict of stale raw payloads (to be revalidated)
+        fresh = {}
+        stale = {}
+        if len(keys) == 0:
+            return fresh, stale
+
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                query = f"SELECT EpicKey, Raw, FetchedAt FROM epics WHERE EpicKey IN ({placeholders})"
+
+                for epic_key, raw, fetched_at in self.db.execute(query, chunk):
+                    if now - fetched_at <= self.ttl:
+                        fresh[epic_key] = json.loads(raw)
+                    else:
+                        stale[epic_key] = json.loads(raw)
+
+            self.stats["hits"] += len(fresh)
+            self.stats["misses"] += len(keys) - len(fresh) - len(stale)
+            self._touch(list(fresh.keys()), now, fetched=False)
+
+        return fresh, stale
+
+    def revalidate(self, keys:list, changed:list=()) -> None:
+        # stale entries confirmed as unchanged by their 'updated' timestamp are hits,
+        # changed ones have to be fetched again and count as misses
+        with self._lock:
+            self.stats["revalidated"] += len(keys)
+            self.stats["hits"] += len(keys)
+            self.stats["misses"] += len(changed)
+            self._touch(keys, time.time(), fetched=True)
+
+    def put_many(self, raws:list) -> None:
+        now = time.time()
+        rows = [(raw['key'], raw['fields'].get('updated'), json.dumps(raw), now, now) for raw in raws]
+
+        with self._lock:
+            self.db.executemany("INSERT OR REPLACE INTO epics VALUES (?, ?, ?, ?, ?)", rows)
+            self.db.commit()
+
+    def evict(self) -> int:
+        # drop entries not used for max_age and the least recently used ones over max_entries
+        with self._lock:
+            border = time.time() - self.max_age
+            removed = self.db.execute("DELETE FROM epics WHERE AccessedAt < ?", (border,)).rowcount
+
+            count = self.db.execute("SELECT COUNT(1) FROM epics").fetchone()[0]
+            if count > self.max_entries:
+                removed += self.db.execute('''DELETE FROM epics WHERE EpicKey IN
+                                                (SELECT EpicKey FROM epics ORDER BY AccessedAt LIMIT ?)''',
+                                           (count - self.max_entries,)).rowcount
+            self.db.commit()
+            self.stats["evictions"] += removed
+
+        self.l.log("Epic cache: %s entries evicted, stats: %s", "DEBUG", removed, self.stats)
+        return removed
+
+    def close(self) -> None:
+        with self._lock:
+            self.db.close()
+
+    def _touch(self, keys:list, now:float, fetched:bool) -> None:
+        if len(keys) == 0:
+            return
+
+        if fetched:
+            query = "UPDATE epics SET AccessedAt = ?, FetchedAt = ? WHERE EpicKey = ?"
+            rows = [(now, now, key) for key in keys]
+        else:
+            query = "UPDATE epics SET AccessedAt = ? WHERE EpicKey = ?"
+            rows = [(now, key) for key in keys]
+
+        self.db.executemany(query, rows)
+        self.db.commit()
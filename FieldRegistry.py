@@ -0,0 +1,92 @@
+import os
+import json
+import time
+import threading
+from jira import JIRA
+from typing import Protocol
+
+
+class Logger(Protocol):
+    def log(self, message:str, level:str, *args, **context):
+        pass
+
+
+class FieldRegistry:
+    # Jira field metadata (field name -> field id), fetched once and shared by all handlers
+    # when root dir is given, metadata is persisted in cache/fields.json and reused until ttl expires
+
+    def __init__(self,
+                 logger:Logger,
+                 jira:JIRA,
+                 rdir:str=None,
+                 ttl:int=24*3600,
+                 min_refresh_interval:int=300) -> None:
+        self.l = logger
+        self.j = jira
+        self.ttl = ttl
+        # forced refreshes on lookup miss are limited, so missing field does not refetch on every issue
+        self.min_refresh_interval = min_refresh_interval
+        self._lock = threading.Lock()
+        self._fetched_at = 0
+        self._name_map = None
+        self.path = None
+
+        if rdir is not None:
+            cache_dir = os.path.join(rdir, "cache")
+            os.makedirs(cache_dir, exist_ok=True)
+            self.path = os.path.join(cache_dir, "fields.json")
+            self._load()
+
+    @property
+    def nameMap(self) -> dict:
+        if self._name_map is None or time.time() - self._fetched_at > self.ttl:
+            self.refresh(stale_before=time.time() - self.ttl)
+        return self._name_map
+
+    def get_id(self, name:str) -> str:
+        field_id = self.nameMap.get(name)
+
+        if field_id is None and time.time() - self._fetched_at > self.min_refresh_interval:
+            # field could have been added or renamed since metadata was fetched
+            self.l.log("Field %s not found in field metadata, forcing refresh", "DEBUG", name)
+            self.refresh(stale_before=time.time() - self.min_refresh_interval)
+            field_id = self._name_map.get(name)
+
+        return field_id
+
+    def refresh(self, stale_before:float=None) -> None:
+        # with stale_before, metadata is fetched only when it is older than that time - checked under
+        # the lock, so threads which waited for another one's refresh don't fetch it again
+        with self._lock:
+            if stale_before is not None and self._name_map is not None and self._fetched_at >= stale_before:
+                return
+
+            self.l.log("Fetching Jira field metadata", "DEBUG")
+            allfields = self.j.fields()
+            self._name_map = {field['name']:field['id'] for field in allfields}
+            self._fetched_at = time.time()
+            self._save()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, 'r') as file:
+                cached = json.load(file)
+            self._name_map = cached['fields']
+            self._fetched_at = cached['fetched_at']
+            self.l.log("Field metadata loaded from %s", "DEBUG", self.path)
+
+        except (OSError, ValueError, KeyError) as err:
+            self.l.log("Couldn't read field metadata cache: %s", "WARNING", err)
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+
+        # write to temporary file first, so concurrent readers never see half-written cache
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump({'fetched_at': self._fetched_at, 'fields': self._name_map}, file)
+        os.replace(tmp_path, self.path)
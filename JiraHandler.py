@@ -3,10 +3,11 @@ import yaml
 import keyring as kr
 from jira import JIRA, exceptions
 from typing import Protocol
+from FieldRegistry import FieldRegistry
 
 
 class Logger(Protocol):
-    def log(self, message:str, level:str):
+    def log(self, message:str, level:str, *args, **context):
         pass
 
 
@@ -29,22 +30,24 @@ class JiraHandler:
                 apiKey = jira_creds["APIKey"]
                 server = jira_creds["server"]
                 email = jira_creds["mail"]
+                fields_ttl = config["options"].get("fields_ttl", 24*3600)
 
             self.jira:JIRA = self._establish_connection(apiKey, server, email)
 
             if isinstance(self.jira, JIRA):
-                allfields = self.jira.fields()
-                self.nameMap = {field['name']:field['id'] for field in allfields}
+                # field metadata is shared with Project instances and cached on disk
+                self.fields = FieldRegistry(self.l, self.jira, self._root_dir, ttl=fields_ttl)
+                self.nameMap = self.fields.nameMap
             else:
                 self.errors["jira"] = 4102
-                self.l.log(f"Couldn't get correct JIRA object instance", "CRITICAL")
+                self.l.log("Couldn't get correct JIRA object instance", "CRITICAL", code=4102)
         
         except Exception as err:
             self.errors["main"] = 4101
-            self.l.log(f"Couldn't complete instantiation", "CRITICAL")
-            self.l.log(f"Error message: {err}", "WARNING")
-            self.l.log(f"Config path: {config_file}", "WARNING")
-            self.l.log(f"Connector type: {type(self.jira)}", "WARNING")
+            self.l.log("Couldn't complete instantiation", "CRITICAL", code=4101)
+            self.l.log("Error message: %s", "WARNING", err)
+            self.l.log("Config path: %s", "WARNING", config_file)
+            self.l.log("Connector type: %s", "WARNING", type(self.jira))
 
             
 
@@ -70,19 +73,19 @@ class JiraHandler:
 
             if status_code == 401:
                 self.errors["connection"] = 4201
-                self.l.log(f"Error message: {text}", "WARNING")
-                self.l.log(f"URL: {url}", "WARNING")
+                self.l.log("Error message: %s", "WARNING", text, code=4201)
+                self.l.log("URL: %s", "WARNING", url)
 
             elif status_code == 404:
                 self.errors["connection"] = 4202
-                self.l.log(f"Error message: {text}", "WARNING")
-                self.l.log(f"URL: {url}", "WARNING")
+                self.l.log("Error message: %s", "WARNING", text, code=4202)
+                self.l.log("URL: %s", "WARNING", url)
 
             else:
                 self.errors["connection"] = 4203
-                self.l.log(f"Status code: {status_code}")
-                self.l.log(f"Error message: {text}", "WARNING")
-                self.l.log(f"URL: {url}", "WARNING")
+                self.l.log("Status code: %s", "RUN", status_code)
+                self.l.log("Error message: %s", "WARNING", text, code=4203)
+                self.l.log("URL: %s", "WARNING", url)
             
             return None
 
@@ -0,0 +1,250 @@
+import os
+import re
+import gzip
+import json
+import yaml
+import queue
+import atexit
+import shutil
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+
+def index_path(logfile:str) -> str:
+    # sidecar index of structured logfile, kept in debug/index so it is not mistaken for a logfile
+    # archived logfile keeps the index of its uncompressed name
+    name = os.path.basename(logfile)
+    if name.endswith(".gz"):
+        name = name[:-3]
+    return os.path.join(os.path.dirname(logfile), "index", name + ".idx")
+
+
+class LogArchive:
+    # manifest of logfiles in debug/ (debug/manifest.json) - for every logfile its current file name,
+    # date range, size and levels present (None when not known, ex. files from before the manifest)
+    # rotated logfiles are gzipped by background thread, retention and selection of recent logs
+    # are manifest lookups instead of directory scans
+    _instances = {}
+    _instances_lock = threading.Lock()
+    logfile_pattern = re.compile(r"logfile_(\d{2})_(\d{2})_(\d{4})-(\d{3,})\.log(\.gz)?")
+
+    @classmethod
+    def get(cls, rdir:str) -> "LogArchive":
+        # one archive per root dir for the whole process, shared by Logger and Notifier
+        with cls._instances_lock:
+            if rdir not in cls._instances:
+                cls._instances[rdir] = cls(rdir)
+            return cls._instances[rdir]
+
+    def __init__(self, rdir:str) -> None:
+        self._root_dir = rdir
+        self.logs_dir = os.path.join(rdir, "debug")
+        self.path = os.path.join(self.logs_dir, "manifest.json")
+        # reentrant, broken manifest is rebuilt while reloading under the lock
+        self._lock = threading.RLock()
+        self._queue = queue.Queue()
+        self._worker = None
+        self._mtime = None
+
+        config_file = os.path.join(rdir, "settings", "config.yaml")
+        with open(config_file, 'r') as file:
+            config = yaml.load(file, yaml.SafeLoader)
+            archive_config:dict = config['options'].get('log_archive', {})
+
+        self.compress = archive_config.get('compress', True)
+        # logfiles not written to for this many seconds were left by finished runs and are archived too
+        self.stale_after = archive_config.get('stale_after', 24*3600)
+
+        self.entries = {}
+        if os.path.exists(self.path):
+            self._load()
+        else:
+            self.rebuild()
+
+        self._sweep()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r') as file:
+                self.entries = json.load(file)
+            self._mtime = os.stat(self.path).st_mtime_ns
+        except (OSError, ValueError):
+            # broken manifest is rebuilt from file names
+            self.rebuild()
+
+    def _reload(self) -> None:
+        # pick up changes made by other processes since the manifest was read
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self._load()
+
+    def _save(self) -> None:
+        # write to temporary file first, so concurrent readers never see half-written manifest
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(self.entries, file, indent=1)
+        os.replace(tmp_path, self.path)
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    def _parse_name(self, file:str) -> tuple:
+        # (manifest key, file date) of logfile name, None for any other file
+        match = self.logfile_pattern.fullmatch(file)
+        if match is None:
+            return None
+        day, month, year = (int(group) for group in match.groups()[:3])
+        try:
+            file_date = date(year, month, day)
+        except ValueError:
+            return None
+        name = file[:-3] if match.group(5) else file
+        return name, file_date
+
+    def rebuild(self) -> None:
+        # one scan of debug/, only needed when manifest is missing or broken
+        with self._lock:
+            self.entries = {}
+            for file in os.listdir(self.logs_dir):
+                parsed = self._parse_name(file)
+                if parsed is None:
+                    continue
+                name, file_date = parsed
+                self.entries[name] = {"file": file,
+                                      "date_from": file_date.isoformat(),
+                                      "date_to": file_date.isoformat(),
+                                      "size": os.path.getsize(os.path.join(self.logs_dir, file)),
+                                      "levels": None,
+                                      "archived": file.endswith(".gz")}
+            self._save()
+
+    def add(self, path:str) -> None:
+        # register newly created logfile
+        name = os.path.basename(path)
+        today = date.today().isoformat()
+        with self._lock:
+            self._reload()
+            self.entries[name] = {"file": name,
+                                  "date_from": today,
+                                  "date_to": today,
+                                  "size": 0,
+                                  "levels": [],
+                                  "archived": False}
+            self._save()
+
+    def update(self, path:str, levels:set) -> None:
+        # record final state of logfile which is still written to or was just closed
+        name = os.path.basename(path)
+        with self._lock:
+            self._reload()
+            entry = self.entries.get(name)
+            if entry is None or entry["archived"]:
+                return
+            entry["date_to"] = date.today().isoformat()
+            entry["levels"] = sorted(set(entry["levels"] or []) | set(levels))
+            if os.path.exists(path):
+                entry["size"] = os.path.getsize(path)
+            self._save()
+
+    def rotated(self, path:str, levels:set) -> None:
+        # logfile won't be written to anymore, compress it in the background
+        self.update(path, levels)
+        if self.compress:
+            self._submit(os.path.basename(path))
+
+    def _sweep(self) -> None:
+        # archive logfiles left uncompressed by runs which ended (or crashed) without rotating them
+        if not self.compress:
+            return
+
+        border = time.time() - self.stale_after
+        for name, entry in list(self.entries.items()):
+            if entry["archived"]:
+                continue
+            path = os.path.join(self.logs_dir, entry["file"])
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            if mtime < border:
+                with self._lock:
+                    entry["date_to"] = max(entry["date_to"], datetime.fromtimestamp(mtime).date().isoformat())
+                self._submit(name)
+
+    def _submit(self, name:str) -> None:
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._compress_loop, name="LogArchive", daemon=True)
+                self._worker.start()
+                atexit.register(self.close)
+        self._queue.put(name)
+
+    def _compress_loop(self) -> None:
+        while True:
+            name = self._queue.get()
+            if name is None:
+                return
+            self._compress(name)
+
+    def _compress(self, name:str) -> None:
+        path = os.path.join(self.logs_dir, name)
+        gz_path = path + ".gz"
+        try:
+            with open(path, 'rb') as source, gzip.open(gz_path + ".tmp", 'wb') as target:
+                shutil.copyfileobj(source, target)
+            os.replace(gz_path + ".tmp", gz_path)
+            os.remove(path)
+        except OSError:
+            # logfile stays uncompressed, it is still covered by the manifest
+            return
+
+        with self._lock:
+            self._reload()
+            entry = self.entries.get(name)
+            if entry is not None:
+                entry["file"] = name + ".gz"
+                entry["size"] = os.path.getsize(gz_path)
+                entry["archived"] = True
+                self._save()
+
+    def close(self) -> None:
+        # finish queued compressions, registered at exit once the first one is queued
+        if self._worker is None or not self._worker.is_alive():
+            return
+        self._queue.put(None)
+        self._worker.join()
+
+    def files_since(self, days:int=None) -> list:
+        # paths of logfiles with records from the last number of days (all when days is None),
+        # ordered by date and index
+        border = (date.today() - timedelta(days=days)).isoformat() if days is not None else ""
+        with self._lock:
+            self._reload()
+            selected = [(entry["date_from"], name, entry["file"]) for name, entry in self.entries.items()
+                        if entry["date_to"] >= border]
+
+        # entries of files removed by hand are skipped
+        paths = [os.path.join(self.logs_dir, file) for _, _, file in sorted(selected)]
+        return [path for path in paths if os.path.exists(path)]
+
+    def remove_older_than(self, days:int) -> list:
+        # delete logfiles (and their indexes) whose newest records are older than number of days,
+        # returns removed paths
+        border = (date.today() - timedelta(days=days)).isoformat()
+        removed = []
+        with self._lock:
+            self._reload()
+            for name, entry in list(self.entries.items()):
+                if entry["date_to"] >= border:
+                    continue
+                path = os.path.join(self.logs_dir, entry["file"])
+                for file_path in (path, index_path(path)):
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
+                del self.entries[name]
+                removed.append(path)
+            if len(removed) > 0:
+                self._save()
+        return removed
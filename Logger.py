@@ -1,18 +1,45 @@
-from datetime import datetime, date, timedelta
+from datetime import datetime, date
 import os
+import re
+import sys
+import json
 import yaml
+import queue
+import atexit
+import threading
+import time
+from LogArchive import LogArchive, index_path
 
 levels = ["DEBUG", "RUN", "WARNING", "ERROR", "CRITICAL"]
+level_index = {name: index for index, name in enumerate(levels)}
+# context fields of structured records, passed to log() as keyword arguments
+context_fields = ("component", "project", "issue", "code")
+
 
 class Logger:
     _level = ""
     _date_format = ""
     _root_dir = ""
     _filedir = ""
-    _curr_fileline = 1
+    # lines and bytes written to current logfile, kept in memory so rotation never reads the file
+    _curr_fileline = 0
+    _curr_bytes = 0
     _logsize = 0
+    _maxbytes = 0
+    # next free logfile index for _index_date, found by a single directory scan
+    _index_date = None
+    _next_index = 0
+    # formatted date prefix is reused for all records logged within the same second
+    _date_second = None
+    _date_prefix = ""
+    # size of the last accounted record, its offset is _curr_bytes - _last_size
+    _last_size = 0
+    # projects can be scraped concurrently, file access has to be serialized
+    _lock = threading.Lock()
+    # sentinel telling the background writer to flush and stop
+    _stop = object()
 
-    def __new__(cls, rdir, level, dtformat=None, logsize=3000):
+    def __new__(cls, rdir, level, dtformat=None, logsize=3000, buffered=None, maxbytes=None, structured=None):
         
         if level not in levels:
             print("CRITICAL: Unknown Logger Level")
@@ -21,17 +48,35 @@ class Logger:
         instance = super().__new__(cls)
         return instance
 
-    def __init__(self, rdir, level, dtformat=None, logsize=3000) -> None:
+    def __init__(self, rdir, level, dtformat=None, logsize=3000, buffered=None, maxbytes=None, structured=None) -> None:
         self._root_dir = rdir
         self._logsize = logsize
-        self._filedir = self._get_filepath()
         self.config_file = os.path.join(self._root_dir, "settings", "config.yaml")
         with open(self.config_file, 'r') as file:
             self.config = yaml.load(file, yaml.SafeLoader)
+
+        # optional size based rotation on top of the line limit, 0 disables it
+        if maxbytes is None:
+            maxbytes = self.config['options'].get('log_max_bytes', 0)
+        self._maxbytes = maxbytes
+
+        # structured mode writes one JSON object per line, with sidecar index of WARNING and above
+        # records and records carrying error code (see log_query.py)
+        if structured is None:
+            structured = self.config['options'].get('log_format', 'text') == 'json'
+        self._structured = structured
+        # byte offsets in the index have to match the file, so no newline translation
+        self._newline = "" if structured else None
+
+        # rotated logfiles are handed over to the archive for compression and retention
+        self._archive = LogArchive.get(self._root_dir)
+        self._rotated = None
+        self._filedir = self._get_filepath()
         if dtformat == None:
             dtformat = self.config['options']['dateformat']
 
         self._level = level
+        self._threshold = level_index[level]
         
         match dtformat:
             case 'EU':
@@ -43,87 +88,316 @@ class Logger:
             case _:
                 self._date_format = r"%d/%m/%Y [%H:%M:%S] | "
 
+        # buffered mode - records are queued and written in batches by background thread,
+        # which keeps the logfile open instead of reopening it for every record
+        buffer_config:dict = self.config['options'].get('log_buffer', {})
+        if buffered is None:
+            buffered = buffer_config.get('enabled', False)
+
+        self._buffered = buffered
+        self._writer = None
+        if self._buffered:
+            # bounded, so producers are slowed down instead of growing memory when disk can't keep up
+            self._queue = queue.Queue(maxsize=buffer_config.get('queue_size', 10000))
+            self._flush_lines = buffer_config.get('flush_lines', 500)
+            self._flush_interval = buffer_config.get('flush_interval', 1.0)
+            self._writer = threading.Thread(target=self._write_loop, name="LoggerWriter", daemon=True)
+            self._writer.start()
+
+        # daemon thread would be killed at exit with records still in the queue,
+        # levels of the last logfile are recorded in the archive manifest
+        atexit.register(self.close)
+
     def _get_filepath(self) -> str:
-        # check what logfiles for current date exist and return path to the new one
-        # by incrementing up to logfile_[date]-999.log
-        today = date.today()
-        d_formatted = today.strftime("%d_%m_%Y")
-
-        for h in range(0, 10):
-            for t in range(0, 10):
-                for d in range(0, 10):
-                    path = os.path.join(self._root_dir, "debug", f"logfile_{d_formatted}-{h}{t}{d}.log")
-
-                    if not os.path.exists(path):
-                        # create new logfile
-                        with open(path, "x") as _:
-                            pass
-                        self._curr_fileline = 1
-                        return path
-
-    def log(self, message, level="RUN"):
-        dtnow = datetime.now()
-        tsnow = datetime.timestamp(dtnow)
-        formatted_date = datetime.now().strftime(self._date_format)
-
-        # if estimate is divisible by 1k or is over logsize check the real file length
-        if self._curr_fileline%1000 == 0 or self._curr_fileline >= self._logsize or self._curr_fileline <= 1:
-            # file read in binary for slight boost on opening time
-            with open(self._filedir, "rb") as f:
-
-                num_lines = sum(1 for _ in f)
-                # update line count with real file line count
-                # plus one to account for file starting line 1 (istead of 0)
-                self._curr_fileline = num_lines + 1
-                
-                # if real fileline count is greater than logsize, create new logfile
-                # and reset estimate to line 1
-                if self._curr_fileline > self._logsize:
-                    self._curr_fileline = 1
-                    self._filedir = self._get_filepath()
-
-        # increment rought estimate of on which file in line logger currently is
-        self._curr_fileline += 1
-   
-        with open(self._filedir, "a+") as file:
-
-            if level not in levels:
-                file.seek(0)
-                data = file.read(10)
-                if len(data) > 0:
-                    file.write("\n")
-
-                file.write("\n")
-                file.write("-" * 10 + '\n')
-                file.write("ERROR: Unknown Logger Level for message:\n")
-                file.write(formatted_date + level + ' | ' + message + '\n')
-                file.write("Timestamp: " + str(tsnow) + '\n')
-                file.write("-" * 10 + '\n')
+        # create new logfile logfile_[date]-NNN.log with the next free index and return its path
+        # logs directory is listed once per date, afterwards the index is only incremented
+        d_formatted = date.today().strftime("%d_%m_%Y")
+        logs_dir = os.path.join(self._root_dir, "debug")
+
+        if self._index_date != d_formatted:
+            pattern = re.compile(rf"logfile_{d_formatted}-(\d{{3,}})\.log(\.gz)?")
+            matches = [pattern.fullmatch(file) for file in os.listdir(logs_dir)]
+            self._next_index = max((int(match.group(1)) for match in matches if match), default=-1) + 1
+            self._index_date = d_formatted
+
+        while True:
+            path = os.path.join(logs_dir, f"logfile_{d_formatted}-{self._next_index:03d}.log")
+            self._next_index += 1
+            try:
+                # create new logfile
+                with open(path, "x") as _:
+                    pass
+            except FileExistsError:
+                # created by another logger since the directory was listed
+                continue
+
+            if self._structured:
+                # empty index tells the reader there is nothing to look up, missing one means full scan
+                os.makedirs(os.path.dirname(index_path(path)), exist_ok=True)
+                with open(index_path(path), "w") as _:
+                    pass
+
+            self._archive.add(path)
+            self._file_levels = set()
+            self._curr_fileline = 0
+            self._curr_bytes = 0
+            return path
+
+    def _account(self, record:str, level:str) -> str:
+        # update counters with record about to be written, rotate logfile when it would exceed
+        # logsize lines or maxbytes bytes - returns separator to be written before the record
+        lines = record.count('\n') + 1
+        size = len(record.encode())
+
+        if self._curr_bytes > 0:
+            over_lines = self._curr_fileline + lines > self._logsize
+            over_bytes = self._maxbytes > 0 and self._curr_bytes + size + 1 > self._maxbytes
+            if over_lines or over_bytes:
+                # handed over to the archive by _hand_over(), once the old logfile is closed
+                self._rotated = (self._filedir, self._file_levels)
+                self._filedir = self._get_filepath()
+
+        self._file_levels.add(level)
+        separator = '\n' if self._curr_bytes > 0 else ''
+        self._last_size = size
+        self._curr_fileline += lines
+        self._curr_bytes += size + len(separator)
+        return separator
+
+    def _hand_over(self) -> None:
+        # cleared first, so failing archive doesn't hand the same logfile over again
+        if self._rotated is not None:
+            rotated, self._rotated = self._rotated, None
+            self._archive.rotated(*rotated)
+
+    def is_enabled(self, level) -> bool:
+        # unknown levels are always written, so the wrong call is visible in the logfile
+        index = level_index.get(level)
+        return index is None or index >= self._threshold
+
+    def log(self, message, level="RUN", *args, **context):
+        # message is %-formatted with args only when the record passes the level filter,
+        # so callers should pass values as args instead of building f-strings
+        # context (project, issue, code, component) is written only in structured mode
+        if not self.is_enabled(level):
+            return
+
+        tsnow = time.time()
+        if args:
+            message = message % args
+
+        if self._structured:
+            if "component" not in context:
+                # module of the caller, scripts are named by their file
+                caller = sys._getframe(1).f_globals
+                component = caller.get("__name__")
+                if component == "__main__":
+                    component = os.path.splitext(os.path.basename(caller.get("__file__", "")))[0]
+                context["component"] = component
+            record = self._format_json(message, level, tsnow, context)
+            indexed = self._index_entry(level, context.get("code"))
+        else:
+            record = self._format(message, level, tsnow)
+            indexed = None
+
+        if self._buffered:
+            # critical records are usually followed by exit, wait until they are on the disk
+            written = threading.Event() if level == "CRITICAL" else None
+            if self._enqueue((record, level, written, indexed)):
+                if written is not None:
+                    written.wait(timeout=5)
                 return
 
-            if levels.index(level) >= levels.index(self._level):
-                file.seek(0)
-                data = file.read(10)
-                if len(data) > 0:
-                    file.write('\n')
+        with self._lock:
+            # records queued before the background writer died go first
+            self._drain()
+            self._write_direct(record, level, indexed)
+
+    def _write_direct(self, record, level, indexed) -> None:
+        # unbuffered write, reopening the logfile - called under the lock
+        separator = self._account(record, level)
+        with open(self._filedir, "a", newline=self._newline) as file:
+            file.write(separator + record)
+        self._hand_over()
+
+        if indexed is not None:
+            with open(index_path(self._filedir), "a") as index:
+                index.write(self._index_line(indexed))
+
+    def _enqueue(self, item) -> bool:
+        # hand the record over to the background writer, False when it is not running anymore,
+        # so full queue doesn't block the caller forever
+        while self._writer.is_alive():
+            try:
+                self._queue.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _drain(self) -> None:
+        # write out records left in the queue of dead background writer - called under the lock
+        if not self._buffered or self._writer.is_alive():
+            return
 
-                file.write(formatted_date + level + ' | ' + message)
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
                 return
+            if item is self._stop:
+                continue
+
+            record, level, written, indexed = item
+            if record is not None:
+                self._write_direct(record, level, indexed)
+            if written is not None:
+                written.set()
+
+    def _format(self, message, level, tsnow) -> str:
+        # text of the record without separating newline
+        second = int(tsnow)
+        if second != self._date_second:
+            self._date_prefix = datetime.fromtimestamp(second).strftime(self._date_format)
+            self._date_second = second
+        formatted_date = self._date_prefix
+
+        if level not in level_index:
+            return ("\n" + "-" * 10 + '\n'
+                    + "ERROR: Unknown Logger Level for message:\n"
+                    + formatted_date + level + ' | ' + message + '\n'
+                    + "Timestamp: " + str(tsnow) + '\n'
+                    + "-" * 10 + '\n')
+
+        return formatted_date + level + ' | ' + message
+
+    def _format_json(self, message, level, tsnow, context:dict) -> str:
+        # single line JSON object, only ASCII so character and byte offsets are the same
+        record = {"timestamp": datetime.fromtimestamp(tsnow).isoformat(timespec="milliseconds"),
+                  "level": level}
+        for field in context_fields:
+            if context.get(field) is not None:
+                record[field] = context[field]
+        record["message"] = message
+
+        return json.dumps(record, default=str)
+
+    def _index_entry(self, level, code) -> tuple:
+        # only records worth looking up without scanning are indexed - WARNING and above,
+        # unknown levels and records with error code
+        index = level_index.get(level)
+        if code is None and index is not None and index < level_index["WARNING"]:
+            return None
+        return (level, code)
+
+    def _index_line(self, indexed:tuple) -> str:
+        # offset of the record just accounted for, followed by its level and error code
+        level, code = indexed
+        offset = self._curr_bytes - self._last_size
+        return f"{offset} {level} {code if code is not None else '-'}\n"
+
+    def _write_loop(self) -> None:
+        # background writer of buffered mode, the only thread touching the logfile and its index
+        # logfile and index are (re)opened lazily, so the writer recovers once disk errors are gone
+        file = None
+        index = None
+        pending = 0
+        last_flush = time.monotonic()
+        failing = False
+
+        while True:
+            timeout = max(0, self._flush_interval - (time.monotonic() - last_flush))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is self._stop:
+                self._close_files(file, index)
+                return
+
+            written = None
+            try:
+                if item is not None:
+                    record, level, written, indexed = item
+
+                    if record is not None:
+                        separator = self._account(record, level)
+                        if self._rotated is not None:
+                            file, index = self._close_files(file, index)
+                        if file is None:
+                            file = open(self._filedir, "a", newline=self._newline)
+                            if self._structured:
+                                index = open(index_path(self._filedir), "a")
+
+                        file.write(separator + record)
+                        if indexed is not None:
+                            index.write(self._index_line(indexed))
+                        pending += 1
+                        self._hand_over()
+
+                # flush on batch size, time threshold or when someone waits for the record
+                if pending >= self._flush_lines or written is not None or \
+                        time.monotonic() - last_flush >= self._flush_interval:
+                    if pending > 0:
+                        file.flush()
+                        if index is not None:
+                            index.flush()
+                    pending = 0
+                    last_flush = time.monotonic()
+                failing = False
+
+            except Exception as err:
+                # writer has to stay alive, otherwise producers block on the full queue -
+                # records of the failed batch are lost, files are reopened with the next record
+                if not failing:
+                    print(f"ERROR: Logger couldn't write to {self._filedir}: {err!r}", file=sys.stderr)
+                failing = True
+                file, index = self._close_files(file, index)
+                pending = 0
+                last_flush = time.monotonic()
+
+            finally:
+                if written is not None:
+                    written.set()
+
+    @staticmethod
+    def _close_files(file, index) -> tuple:
+        # close logfile and index of the background writer, errors of broken files are ignored
+        for handle in (file, index):
+            if handle is None:
+                continue
+            try:
+                handle.close()
+            except OSError:
+                pass
+        return None, None
+
+    def flush(self) -> None:
+        # wait until all records queued so far are written to the logfile
+        if self._writer is None:
+            return
+
+        written = threading.Event()
+        if self._enqueue((None, None, written, None)):
+            written.wait(timeout=5)
+            return
+
+        with self._lock:
+            self._drain()
+
+    def close(self) -> None:
+        # write out queued records and stop background writer, record levels of the current logfile
+        # in the archive manifest - registered at exit
+        if self._writer is not None and self._enqueue(self._stop):
+            self._writer.join(timeout=5)
+
+        with self._lock:
+            self._drain()
+            self._archive.update(self._filedir, self._file_levels)
 
     def clear_logs(self, days: int = 30) -> None:
         # clear logs older than specified number of days (default = 30)
         # has to be periodically called from the outside
-        today = date.today()
-        retention_border = today - timedelta(days=days)
-        logs_dir = os.path.join(self._root_dir, "debug")
-
-        for file in os.listdir(logs_dir):
-            # only consider files with date and number in name
-            if len(file) > 11:
-                # strip everything except the date portion of name
-                str_date = file.lstrip("logfile_").replace("_", "/")[0:-8]
-                file_date = datetime.strptime(str_date, "%d/%m/%Y").date()
-                if file_date < retention_border:
-                    full_path = os.path.join(logs_dir, file)
-                    print(full_path)
-                    os.remove(full_path)
\ No newline at end of file
+        for full_path in self._archive.remove_older_than(days):
+            print(full_path)
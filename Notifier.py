@@ -5,7 +5,7 @@ from email import encoders
 from email.mime.base import MIMEBase
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from datetime import datetime, date, timedelta
+from LogArchive import LogArchive
 
 class Notifier:
 
@@ -34,23 +34,8 @@ class Notifier:
         self.receiver = kr.get_password(mail_namespace, receiver_entry)
 
     def get_recent_logs(self, days:int=1):
-        logs = []
-
-        today = date.today()
-        retention_border = today - timedelta(days=days)
-        logs_dir = os.path.join(self._root_dir, "debug")
-
-        for file in os.listdir(logs_dir):
-            # only consider files with date and number in name
-            if len(file) > 11:
-                # strip everything except the date portion of name
-                str_date = file.lstrip("logfile_").replace("_", "/")[0:-8]
-                file_date = datetime.strptime(str_date, "%d/%m/%Y").date()
-                if file_date >= retention_border:
-                    full_path = os.path.join(logs_dir, file)
-                    logs.append(full_path)
-        
-        return logs
+        # logfiles with records from the last number of days, looked up in the archive manifest
+        return LogArchive.get(self._root_dir).files_since(days)
 
     def notify_by_mail(self, errors:list, attach_logs:bool=True):
         errors_num = len(errors)
@@ -80,7 +65,7 @@ class Notifier:
             log_files = self.get_recent_logs()
 
             for log_file in log_files:
-                filename = log_file[-26:]
+                filename = os.path.basename(log_file)
                 print(filename)
 
                 with open(log_file, 'rb') as file:
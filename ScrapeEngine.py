@@ -0,0 +1,247 @@
+import os
+import yaml
+import threading
+from datetime import datetime, timedelta
+from jira import JIRA
+from typing import Protocol, Callable
+from concurrent.futures import ThreadPoolExecutor
+from structs import Project, ProjectContext, EpicStore
+from EpicCache import EpicCache
+from FieldRegistry import FieldRegistry
+
+
+class Logger(Protocol):
+    def log(self, message:str, level:str, *args, **context):
+        pass
+
+
+class ThrottledJira:
+    # thin proxy over JIRA client - every call holds all given semaphores for the time of the request,
+    # semaphores are always acquired in the same order (project limit first, global limit second)
+
+    def __init__(self, jira:JIRA, *semaphores:threading.Semaphore) -> None:
+        self._jira = jira
+        self._semaphores = semaphores
+
+    def __getattr__(self, name):
+        attr = getattr(self._jira, name)
+        if not callable(attr):
+            return attr
+
+        def throttled(*args, **kwargs):
+            for semaphore in self._semaphores:
+                semaphore.acquire()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                for semaphore in reversed(self._semaphores):
+                    semaphore.release()
+
+        return throttled
+
+
+class ScrapeEngine:
+
+    def __init__(self,
+                 logger:Logger,
+                 rdir:str,
+                 jira:JIRA,
+                 workers:int=None,
+                 per_project:int=None,
+                 fields:FieldRegistry=None) -> None:
+        self._root_dir = rdir
+        self.l = logger
+        self.j = jira
+        self.errors = {}
+
+        self.l.log("Initializing concurrent scrape engine", "DEBUG")
+
+        config_file = os.path.join(self._root_dir, "settings", "config.yaml")
+
+        with open(config_file, 'r') as file:
+            config = yaml.load(file, yaml.SafeLoader)
+            self.projects:dict = config['data']['projects']
+            self.developers:dict = config['data']['developers']
+            concurrency:dict = config['options'].get('concurrency', {})
+            cache_config:dict = config['options'].get('epic_cache', {})
+            incremental:dict = config['options'].get('incremental', {})
+            fields_ttl = config['options'].get('fields_ttl', 24*3600)
+            shared_epics = config['options'].get('shared_epics', 0)
+
+        # explicit arguments take precedence over config file
+        self.workers = workers if workers is not None else concurrency.get('workers', 8)
+        self.per_project = per_project if per_project is not None else concurrency.get('per_project', 2)
+
+        # global limit of Jira requests in flight, shared by all projects
+        self._global_limit = threading.BoundedSemaphore(self.workers)
+
+        self.l.log("Concurrency set to %s requests, %s per project", "DEBUG", self.workers, self.per_project)
+
+        # field metadata is fetched once for all projects - registry of JiraHandler should be passed,
+        # otherwise engine creates its own
+        if fields is None:
+            fields = FieldRegistry(self.l, self.j, self._root_dir, ttl=fields_ttl)
+        self.fields = fields
+
+        self.full_sync_every = incremental.get('full_sync_every', 24*3600)
+        self.overlap = incremental.get('overlap', 5)
+        # issues and watermarks of incrementally scraped projects, waiting for commit_sync
+        self.pending_sync = {}
+
+        # epics resolved by one project can be reused by others - opt-in and size limited
+        self.shared_epics = EpicStore(max_entries=shared_epics) if shared_epics > 0 else None
+
+        self.epic_cache = None
+        if cache_config.get('enabled', False):
+            self.epic_cache = EpicCache(self.l,
+                                        self._root_dir,
+                                        ttl=cache_config.get('ttl', 24*3600),
+                                        max_age=cache_config.get('max_age', 30*24*3600),
+                                        max_entries=cache_config.get('max_entries', 10000))
+
+    def _scrape_project(self,
+                        key:str,
+                        limit:int,
+                        updated_since:datetime=None,
+                        on_flush:Callable=None,
+                        flush_size:int=0) -> Project:
+        context = ProjectContext(key, epics=self.shared_epics, on_flush=on_flush, flush_size=flush_size)
+        project_limit = threading.BoundedSemaphore(self.per_project)
+        jira = ThrottledJira(self.j, project_limit, self._global_limit)
+
+        project = Project(logger=self.l,
+                          jira=jira,
+                          key=key,
+                          developers_dict=self.developers,
+                          projects_dict=self.projects,
+                          workers=self.per_project,
+                          epic_cache=self.epic_cache,
+                          fields=self.fields,
+                          context=context)
+        project.gather_issues(limit=limit, updated_since=updated_since)
+
+        return project
+
+    def run(self,
+            keys:list=None,
+            limit:int=500,
+            since:dict=None,
+            on_flush:Callable=None,
+            flush_size:int=0) -> dict:
+        # scrape all given projects (every project from config by default) concurrently,
+        # results and errors are always ordered as the requested keys
+        # since maps project keys to watermarks, projects without one are scraped in full
+        # with on_flush(key, issues) given, issues are handed over in batches (called from worker threads)
+        # and released right after, so memory is bounded by the projects in flight, not all of them
+        if keys is None:
+            keys = list(self.projects.keys())
+        if since is None:
+            since = {}
+
+        self.l.log("Starting concurrent scrape of %s projects", "RUN", len(keys))
+        results = {}
+        # errors describe the last run only, projects which failed before may succeed now
+        self.errors = {}
+        self._scraped = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self._scrape_project, key, limit, since.get(key), on_flush, flush_size)
+                       for key in keys]
+
+            for key, future in zip(keys, futures):
+                try:
+                    project = future.result()
+                    results[key] = project.project_issues
+                    self._scraped[key] = project
+                    if len(project.errors) > 0:
+                        self.errors[key] = project.errors
+                    if on_flush is not None:
+                        project.context.release()
+
+                except Exception as err:
+                    results[key] = None
+                    self.errors[key] = {"main": [1101]}
+                    self.l.log("Scrape of project %s failed: %s", "ERROR", key, err, project=key, code=1101)
+
+        if self.epic_cache is not None:
+            self.epic_cache.evict()
+            self.l.log("Epic cache stats: %s", "RUN", self.epic_cache.stats)
+
+        self.l.log("Concurrent scrape finished, %s projects reported errors", "RUN", len(self.errors))
+
+        return results
+
+    def run_incremental(self, db, keys:list=None, limit:int=100000) -> dict:
+        # scrape only issues updated since the stored watermark of each project,
+        # projects without watermark or with outdated full sync are scraped in full
+        # full pass cut by the limit continues from its watermark in the next runs, until one fits in the limit
+        if keys is None:
+            keys = list(self.projects.keys())
+
+        since = {}
+        full_sync = {}
+        resumed = set()
+        now = datetime.utcnow()
+
+        for key in keys:
+            watermark = db.get_watermark(key)
+            if watermark is not None and watermark['fullSync'] is None:
+                # full pass of the previous run was cut by the limit, issues up to the watermark are stored
+                full_sync[key] = False
+                since[key] = watermark['updated']
+                resumed.add(key)
+            elif watermark is None or now - watermark['fullSync'] > timedelta(seconds=self.full_sync_every):
+                full_sync[key] = True
+            else:
+                full_sync[key] = False
+                since[key] = watermark['updated']
+
+        self.l.log("Incremental scrape, %s of %s projects need full reconciliation, %s continue cut full pass", "RUN",
+                   sum(full_sync.values()), len(keys), len(resumed))
+        results = self.run(keys, limit=limit, since=since)
+
+        for key, project in self._scraped.items():
+            updated = project.max_updated if project.max_updated is not None else since.get(key)
+            # issues come ordered by 'updated', so watermark of a pass cut by the limit is still safe
+            cut = len(project.project_issues) >= limit
+            if full_sync[key] or key in resumed:
+                # full pass is finished by the first pass which fits in the limit
+                full_state = None if cut else True
+            else:
+                full_state = False
+
+            # only a full pass which fit in the limit holds the whole project and can reconcile deletions
+            reconcile = full_sync[key] and not cut
+            if key in resumed and not cut:
+                self.l.log("Full pass of project %s finished over several runs, deleted issues were not reconciled", "WARNING",
+                           key, project=key)
+
+            self.pending_sync[key] = {'issues': project.project_issues,
+                                      'updated': updated,
+                                      'full': reconcile,
+                                      'full_sync': full_state}
+
+        return results
+
+    def commit_sync(self, db) -> None:
+        # write issues of the last run_incremental with DBHandler.sync_issues - only new and changed issues
+        # are written, for full reconciliation passes issues no longer present in Jira are deleted,
+        # summary table is refreshed - watermarks are advanced afterwards
+        for key, sync in self.pending_sync.items():
+            db.sync_issues(sync['issues'], key, delete_missing=sync['full'])
+
+            if sync['updated'] is not None:
+                db.set_watermark(key, sync['updated'], full_sync=sync['full_sync'])
+
+        self.pending_sync = {}
+
+
+if __name__ == "__main__":
+    from Logger import Logger
+    from JiraHandler import JiraHandler
+    root_dir = os.path.dirname(__file__)
+    logger = Logger(root_dir, "DEBUG")
+    handler = JiraHandler(logger, root_dir)
+    engine = ScrapeEngine(logger, root_dir, handler.jira, fields=handler.fields)
+    print(engine.run())
+    print(engine.errors)
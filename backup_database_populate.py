@@ -1,6 +1,7 @@
 import os
 import yaml
 import mysql.connector
+from ConnectionPool import ConnectionPool
 
 
 class DBPopulator:
@@ -9,43 +10,14 @@ class DBPopulator:
         
         self.root_dir = root_dir
         self.config_file = os.path.join(self.root_dir, "settings", "config.yaml")
-        self.db_namespace = "DB"
         self.logger = logger
-
-        system = os.name
-        if system == "nt":
-            import keyring as kr
-        elif system == "posix":
-            import keyring as kr
-            from keyrings.cryptfile.cryptfile import CryptFileKeyring
-            krcrypt = CryptFileKeyring()
-            krcrypt.keyring_key = os.getenv('KRCRYPT_PASS')
-            kr.set_keyring(krcrypt)
         
         self.logger.log("Starting the database check", "DEBUG")
 
         with open(self.config_file, 'r', encoding='utf-8') as file:
             config = yaml.load(file, yaml.SafeLoader)
-            self.credentials:dict = config['credentials']
-            self.db_creds:dict = self.credentials['database']
-            self.host_entry = self.db_creds['host']
-            self.user_entry = self.db_creds['user']
-            self.password_entry = self.db_creds['password']
-            self.database_entry = self.db_creds['database']
 
             self.logger.log("Config file read", "DEBUG")
-            self.logger.log(f"Host ENV VAR key: {self.host_entry}", "DEBUG")
-            self.logger.log(f"User ENV VAR key: {self.user_entry}", "DEBUG")
-            self.logger.log(f"Password ENV VAR key: {self.password_entry}", "DEBUG")
-            self.logger.log(f"Database ENV VAR key: {self.database_entry}", "DEBUG")
-
-            # get obscured login data, stored in env. variables    
-            self.host_data = self.host_entry  # host data stored plain in config file
-            self.user_data = kr.get_password(self.db_namespace, self.user_entry)
-            self.password_data = kr.get_password(self.db_namespace, self.password_entry)
-            self.database_data = kr.get_password(self.db_namespace, self.database_entry)
-
-            self.logger.log("Obscured data retrieved", "DEBUG")
 
             # get the list of necessary tables, projects, testers
             self.tables:list = config['tables']
@@ -53,20 +25,16 @@ class DBPopulator:
             self.developers:dict = config['data']['developers']
             self.testers:dict = config['testers']
 
-            self.logger.log(f"Required tables: {self.tables}", "DEBUG")
+            self.logger.log("Required tables: %s", "DEBUG", self.tables)
+
+        # connections and obscured login data are provided by the shared pool
+        self.pool = ConnectionPool.get(self.logger, self.root_dir)
 
     def _establish_connection(self, recursion_depth:int = 5) -> mysql.connector.MySQLConnection | bool:
         recursion_depth -= 1
         self.logger.log("Connecting to database", "DEBUG")
         try:
-            db = mysql.connector.connect(
-                host=self.host_data,
-                user=self.user_data,
-                password=self.password_data,
-                database=self.database_data,
-                use_unicode=True,
-                charset="utf8"
-            )
+            db = self.pool.get_connection()
 
             return db
 
@@ -76,7 +44,7 @@ class DBPopulator:
                 return False
             
             self.logger.log("Connection not achieved", "ERROR")
-            self.logger.log(f"Error message: '{perr}'", "ERROR")
+            self.logger.log("Error message: '%s'", "ERROR", perr)
             self.logger.log("Checking if db exists and trying to recreate if not", "DEBUG")
             result = self._create_db()
 
@@ -84,57 +52,68 @@ class DBPopulator:
                 self.logger.log("Database should exist", "DEBUG")
                 self.logger.log("Trying to reconnect", "DEBUG")
                 recon_result = self._establish_connection(recursion_depth)
-                self.logger.log(f"Connection status: {'Achieved' if recon_result is not False else 'Not achieved'}")
+                self.logger.log("Connection status: %s", "RUN", 'Achieved' if recon_result is not False else 'Not achieved')
                 return recon_result
             else:
                 self.logger.log("Couldn't correctly create database", "DEBUG")
                 return False
 
+        except mysql.connector.Error as merr:
+            self.logger.log("Connection not achieved", "ERROR")
+            self.logger.log("Error message: '%s'", "ERROR", merr)
+            return False
+
+    def _insert_missing(self,
+            cursor:mysql.connector.MySQLConnection.cursor,
+            connection:mysql.connector.MySQLConnection,
+            query:str,
+            rows:list) -> bool:
+        # one multi-row insert (executemany of INSERT is batched by the connector) verified by affected rows
+        try:
+            cursor.executemany(query, rows)
+            inserted = cursor.rowcount
+            connection.commit()
+
+        except mysql.connector.Error as merr:
+            connection.rollback()
+            self.logger.log("Error encountered: %s", "ERROR", merr)
+            return False
+
+        if inserted != len(rows):
+            self.logger.log("Only %s of %s rows inserted", "ERROR", inserted, len(rows))
+            return False
+
+        return True
+
     def _populate_testers(self,
         cursor:mysql.connector.MySQLConnection.cursor, 
         connection:mysql.connector.MySQLConnection) -> bool:
 
         query = "INSERT INTO testers (Username, Name, Surname, Company) VALUES (%s, %s, %s, %s)"
 
-        def get_current_testers():
-            #get currently existing testers
-            self.logger.log("Collecting current testers", "DEBUG")
-            found_testers = []
-            cursor.execute("SELECT * FROM testers")
-            for tester_tuple in cursor:
-                found_testers.append(tester_tuple[1])
-            self.logger.log(f"Found testers: {found_testers}", "DEBUG")
-            return found_testers
-
-        found_testers = get_current_testers()
-        for tester in self.testers.keys():
-            if tester not in found_testers:
-
-                self.logger.log(f"Tester {tester} not found in database. Adding", "DEBUG")
-
-                username = tester
-                name = self.testers[tester]['name']
-                surname = self.testers[tester]['surname']
-                company = self.testers[tester]['company']
-                placeholder = (username, name, surname, company)
-                cursor.execute(query, placeholder)
-                self.logger.log(f"Tester {tester} added", "DEBUG")
-        
-        connection.commit()
-        
-        try:
-            self.logger.log("Checking if commited", "DEBUG")
-            found_testers = get_current_testers()
-            for tester in self.testers.keys():
-                assert tester in found_testers
+        #get currently existing testers
+        self.logger.log("Collecting current testers", "DEBUG")
+        cursor.execute("SELECT Username FROM testers")
+        found_testers = {tester_tuple[0] for tester_tuple in cursor.fetchall()}
+        self.logger.log("Found %s testers", "DEBUG", len(found_testers))
+
+        missing = [tester for tester in self.testers.keys() if tester not in found_testers]
+
+        if len(missing) == 0:
             self.logger.log("All testers present in database", "DEBUG")
             return True
 
-        except AssertionError as aerr:
-            base = set(self.testers)
-            diff = [x for x in found_testers if x not in base]
-            self.logger.log(f"Error encountered: {aerr}", "ERROR")
-            self.logger.log(f"Testers still not added: {diff}", "ERROR")
+        self.logger.log("Testers %s not found in database. Adding", "DEBUG", missing)
+        rows = [(tester,
+                 self.testers[tester]['name'],
+                 self.testers[tester]['surname'],
+                 self.testers[tester]['company']) for tester in missing]
+
+        if self._insert_missing(cursor, connection, query, rows):
+            self.logger.log("%s testers added, all testers present in database", "DEBUG", len(rows))
+            return True
+        else:
+            self.logger.log("Testers still not added: %s", "ERROR", missing)
             return False
 
     def _populate_projects(self,
@@ -143,49 +122,32 @@ class DBPopulator:
         
         query = "INSERT INTO projects (ProjectKey, ProviderID, DeviceType, ProductID, ProjectName) VALUES (%s, %s, %s, %s, %s)"
 
-        def get_current_projects():
-            self.logger.log("Collecting current projects", "DEBUG")
-            found_projects = []
-            cursor.execute("SELECT * FROM projects")
-            for project_tuple in cursor:
-                found_projects.append(project_tuple[1])
-            self.logger.log(f"Found projects: {found_projects}", "DEBUG")
-            return found_projects
-        
-        def find_provider(project):
-            for provider, projects_list in self.developers.items():
-                if project in projects_list:
-                    return provider
-
-        found_projects = get_current_projects()
-        for project in self.projects.keys():
-            if project not in found_projects:
-                self.logger.log(f"Project {project} not found in database. Adding", "DEBUG")
-
-                provider = find_provider(project)
-                device_type = self.projects[project]['type']
-                product_id = self.projects[project]['ID']
-                project_name = self.projects[project]['name']
-                placeholder = (project, provider, device_type, product_id, project_name)
-
-                cursor.execute(query, placeholder)
-                self.logger.log(f"Project {project} added", "DEBUG")
-        
-        connection.commit()
-        
-        try:
-            self.logger.log("Checking if commited", "DEBUG")
-            found_projects = get_current_projects()
-            for project in self.projects.keys():
-                assert project in found_projects
+        self.logger.log("Collecting current projects", "DEBUG")
+        cursor.execute("SELECT ProjectKey FROM projects")
+        found_projects = {project_tuple[0] for project_tuple in cursor.fetchall()}
+        self.logger.log("Found %s projects", "DEBUG", len(found_projects))
+
+        missing = [project for project in self.projects.keys() if project not in found_projects]
+
+        if len(missing) == 0:
             self.logger.log("All projects present in database", "DEBUG")
             return True
-        
-        except AssertionError as aerr:
-            base = set(self.projects)
-            diff = [x for x in found_projects if x not in base]
-            self.logger.log(f"Error encountered: {aerr}", "ERROR")
-            self.logger.log(f"Projects still not added: {diff}", "ERROR")
+
+        # index of provider of every project, built once instead of searching developers for each project
+        providers = {project: provider for provider, projects_list in self.developers.items() for project in projects_list}
+
+        self.logger.log("Projects %s not found in database. Adding", "DEBUG", missing)
+        rows = [(project,
+                 providers.get(project),
+                 self.projects[project].get('type'),
+                 self.projects[project]['ID'],
+                 self.projects[project]['name']) for project in missing]
+
+        if self._insert_missing(cursor, connection, query, rows):
+            self.logger.log("%s projects added, all projects present in database", "DEBUG", len(rows))
+            return True
+        else:
+            self.logger.log("Projects still not added: %s", "ERROR", missing)
             return False
 
     def _create_db(self) -> bool:
@@ -193,11 +155,7 @@ class DBPopulator:
         self.logger.log("Connecting to SQL without specified database", "DEBUG")
 
         try:
-            db = mysql.connector.connect(
-                host=self.host_data,
-                user=self.user_data,
-                password=self.password_data
-            )
+            db = self.pool.server_connection()
             if db.is_connected():
                 self.logger.log("Connection established", "DEBUG")
             else:
@@ -206,47 +164,34 @@ class DBPopulator:
         
         except mysql.connector.errors.ProgrammingError as perr:
             self.logger.log("Connection not achieved", "ERROR")
-            self.logger.log(f"Error message: '{perr}'", "ERROR")
+            self.logger.log("Error message: '%s'", "ERROR", perr)
             return False
         
         cursor = db.cursor()
         cursor.execute("SHOW DATABASES")
         found_dbs = []
         for db_result in cursor:
-            found_dbs.append(db_result)
+            found_dbs.append(db_result[0])
         
-        if not self.database_data in found_dbs:
-            self.logger.log(f"Database {self.database_data} not found, creating", "DEBUG")
-            cursor.execute(f"CREATE DATABASE {self.database_data}")
-
-            # after creating the db, try connecting to it
-            db.disconnect()
-
-            try:
-                db = mysql.connector.connect(
-                    host=self.host_data,
-                    user=self.user_data,
-                    password=self.password_data,
-                    database=self.database_data
-                )
-            except mysql.connector.errors.ProgrammingError as perr:
-                self.logger.log("Connection not achieved", "ERROR")
-                self.logger.log(f"Error message: '{perr}'", "ERROR")
-                return False
+        if not self.pool.database in found_dbs:
+            self.logger.log("Database %s not found, creating", "DEBUG", self.pool.database)
+            cursor.execute(f"CREATE DATABASE {self.pool.database}")
 
-            if db.is_connected():
-                self.logger.log("Database correctly created and connected to", "DEBUG")
-                import init_database_tables as init_db
-                self.logger.log("Creating required tables", "DEBUG")
-                result = init_db.update_tables(db)
-                if result is True:
-                    self.logger.log("Database correctly created, tables updated", "DEBUG")
-                    db.disconnect()
-                    return True
-                else:
-                    self.logger.log("Couldn't properly update tables", "ERROR")
-                    db.disconnect()
-                    return False
+        # server connection is needed only to create the database
+        db.disconnect()
+
+        # pool could have failed on missing database, it is recreated on next connection
+        self.pool.reset()
+
+        from init_database_tables import TableInitializer
+        self.logger.log("Creating required tables", "DEBUG")
+        result = TableInitializer(self.root_dir, self.logger).update_tables()
+        if result is True:
+            self.logger.log("Database correctly created, tables updated", "DEBUG")
+            return True
+        else:
+            self.logger.log("Couldn't properly update tables", "ERROR")
+            return False
 
     def populate_database(self) -> bool:
         self.logger.log("Initiate populating database", "DEBUG")
@@ -265,6 +210,9 @@ class DBPopulator:
         testers_table_population = self._populate_testers(cursor, db)
         projects_table_population = self._populate_projects(cursor, db)
 
+        # return database connection to the pool
+        db.close()
+
         if testers_table_population and projects_table_population:
             self.logger.log("Database correctly populated", "DEBUG")
             return True
@@ -274,7 +222,7 @@ class DBPopulator:
             # get a list of names of variables that returned false 
             problems = [[name for name in globals() if globals()[name] == y] for y in results if y is False]
             for problem in problems:
-                self.logger.log(f"Problem encountered: {problem} not achieved correctly - returned False")
+                self.logger.log("Problem encountered: %s not achieved correctly - returned False", "RUN", problem)
             
             return False
 
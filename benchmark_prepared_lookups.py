@@ -0,0 +1,62 @@
+import os
+import time
+from sys import argv
+from Logger import Logger
+from DBHandler import DBHandler
+
+# compare per-lookup latency of text protocol and server-side prepared statement
+# for single issue lookups, run against local MySQL/MariaDB configured in config.yaml:
+#   python benchmark_prepared_lookups.py [number of lookups]
+
+root_dir = os.path.dirname(__file__)
+
+
+def sample_keys(handler:DBHandler, count:int) -> list:
+    handler.cursor.execute("SELECT TestKey FROM issues LIMIT %s", (count,))
+    return [key_tuple[0] for key_tuple in handler.cursor.fetchall()]
+
+
+def bench_text(handler:DBHandler, keys:list) -> float:
+    query = handler.hot_statements["issue_by_key"]
+    start = time.perf_counter()
+    for key in keys:
+        handler.cursor.execute(query, (key,))
+        handler.cursor.fetchall()
+    return (time.perf_counter() - start) / len(keys)
+
+
+def bench_prepared(handler:DBHandler, keys:list) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        handler._execute_prepared("issue_by_key", (key,))
+    return (time.perf_counter() - start) / len(keys)
+
+
+if __name__ == "__main__":
+    lookups = int(argv[1]) if len(argv) > 1 else 5000
+
+    logger = Logger(root_dir, "RUN")
+    # lookup cache would hide the database round trips
+    handler = DBHandler(logger, root_dir, cache=False)
+
+    keys = sample_keys(handler, 1000)
+    if len(keys) == 0:
+        print("Issues table is empty, nothing to benchmark")
+        exit(1)
+
+    # repeat sampled keys up to requested number of lookups
+    keys = (keys * (lookups // len(keys) + 1))[:lookups]
+
+    # warm up both paths, so statement preparation is not part of measurement
+    bench_text(handler, keys[:100])
+    bench_prepared(handler, keys[:100])
+
+    text_latency = bench_text(handler, keys)
+    prepared_latency = bench_prepared(handler, keys)
+
+    print(f"Lookups:            {len(keys)}")
+    print(f"Text protocol:      {text_latency * 1e6:.1f} us/lookup")
+    print(f"Prepared statement: {prepared_latency * 1e6:.1f} us/lookup")
+    print(f"Speedup:            {text_latency / prepared_latency:.2f}x")
+
+    handler.close()
@@ -1,6 +1,7 @@
 import mysql.connector
 import os
 import yaml
+from ConnectionPool import ConnectionPool
 
 
 class TableInitializer:
@@ -9,7 +10,36 @@ class TableInitializer:
     standard_tables = {
     "Testers": "CREATE TABLE Testers (TesterID INT AUTO_INCREMENT PRIMARY KEY, Username VARCHAR(255), Name VARCHAR(255), Surname VARCHAR(255), Company VARCHAR(255))",
     "Projects": "CREATE TABLE Projects (ProjectID INT AUTO_INCREMENT PRIMARY KEY, ProjectKey VARCHAR(255), ProviderID VARCHAR(255), DeviceType VARCHAR(255), ProductID VARCHAR(255), ProjectName VARCHAR(255))",
-    "Issues": "CREATE TABLE Issues (TestID INT AUTO_INCREMENT PRIMARY KEY, TestKey VARCHAR(255), TestType VARCHAR(255), DistChannel VARCHAR(255), TesterID INT, ProjectID INT, FOREIGN KEY (TesterID) REFERENCES testers(TesterID) , FOREIGN KEY (ProjectID) REFERENCES projects(ProjectID), Time FLOAT(4))"
+    "Issues": "CREATE TABLE Issues (TestID INT AUTO_INCREMENT PRIMARY KEY, TestKey VARCHAR(255), TestType VARCHAR(255), DistChannel VARCHAR(255), TesterID INT, ProjectID INT, FOREIGN KEY (TesterID) REFERENCES testers(TesterID) , FOREIGN KEY (ProjectID) REFERENCES projects(ProjectID), Time FLOAT(4), SoftwareVersion VARCHAR(255), ContentHash CHAR(40), UNIQUE INDEX uq_issues_testkey (TestKey))",
+    "Watermarks": "CREATE TABLE Watermarks (ProjectKey VARCHAR(255) PRIMARY KEY, LastUpdated DATETIME, LastFullSync DATETIME)",
+    "TimeSummary": "CREATE TABLE TimeSummary (ProjectID INT, SoftwareVersion VARCHAR(255), DistChannel VARCHAR(255), TesterID INT, TotalTime DOUBLE, IssueCount INT, INDEX idx_timesummary_group (ProjectID, SoftwareVersion, DistChannel, TesterID))"
+    }
+
+    # tables derived from other tables - filled right after they are created, so on an existing
+    # database they start with data instead of being filled only by later writes
+    seed_queries = {
+    "TimeSummary": "INSERT INTO timesummary (ProjectID, SoftwareVersion, DistChannel, TesterID, TotalTime, IssueCount) SELECT ProjectID, SoftwareVersion, DistChannel, TesterID, SUM(Time), COUNT(1) FROM issues GROUP BY ProjectID, SoftwareVersion, DistChannel, TesterID"
+    }
+
+    # columns added after first release - migrated into tables created by older versions of this script
+    standard_columns = {
+    "Issues": {
+        "SoftwareVersion": "ALTER TABLE Issues ADD COLUMN SoftwareVersion VARCHAR(255)",
+        "ContentHash": "ALTER TABLE Issues ADD COLUMN ContentHash CHAR(40)"
+        }
+    }
+
+    # indexes which have to exist also in existing tables - name: (columns, unique)
+    # non-unique index is skipped if any index (ex. implicit foreign key one) already starts with its column
+    standard_indexes = {
+    "Issues": {
+        "uq_issues_testkey": (("TestKey",), True),
+        "idx_issues_projectid": (("ProjectID",), False),
+        "idx_issues_softver": (("SoftwareVersion",), False)
+        },
+    "Projects": {
+        "idx_projects_key": (("ProjectKey",), False)
+        }
     }
 
     def __init__(self, root_dir, logger) -> None:
@@ -17,64 +47,33 @@ class TableInitializer:
         self.root_dir = root_dir
         self.logger = logger
         self.config_file = os.path.join(root_dir, "settings", "config.yaml")
-        self.db_namespace = "DB"
-
-        system = os.name
-        if system == "nt":
-            import keyring as kr
-        elif system == "posix":
-            import keyring as kr
-            from keyrings.cryptfile.cryptfile import CryptFileKeyring
-            krcrypt = CryptFileKeyring()
-            krcrypt.keyring_key = os.getenv('KRCRYPT_PASS')
-            kr.set_keyring(krcrypt)
-        
-        self.logger.log("Connecting to database", "DEBUG")
+
+        self.logger.log("Reading database configuration", "DEBUG")
 
         # get configuration data from config file
         with open(self.config_file, 'r') as file:
             config = yaml.load(file, yaml.SafeLoader)
-            credentials:dict = config['credentials']
-            db_creds:dict = credentials['database']
-            host_entry = db_creds['host']
-            user_entry = db_creds['user']
-            password_entry = db_creds['password']
-            database_entry = db_creds['database']
 
             self.logger.log("Config file read", "DEBUG")
-            self.logger.log(f"Host ENV VAR key: {host_entry}", "DEBUG")
-            self.logger.log(f"User ENV VAR key: {user_entry}", "DEBUG")
-            self.logger.log(f"Password ENV VAR key: {password_entry}", "DEBUG")
-            self.logger.log(f"Database ENV VAR key: {database_entry}", "DEBUG")
-
-            # get obscured login data, stored in env. variables    
-            self.host_data = host_entry  # host data stored plain in config file
-            self.user_data = kr.get_password(self.db_namespace, user_entry)
-            self.password_data = kr.get_password(self.db_namespace, password_entry)
-            self.database_data = kr.get_password(self.db_namespace, database_entry)
-
-            self.logger.log("Obscured data retrieved", "DEBUG")
 
             # get the list of necessary tables
             self.tables:list = config['tables']
 
-            self.logger.log(f"Required tables: {self.tables}", "DEBUG")
+            self.logger.log("Required tables: %s", "DEBUG", self.tables)
+
+        # connections and obscured login data are provided by the shared pool
+        self.pool = ConnectionPool.get(self.logger, self.root_dir)
 
     def _connect(self):
 
-        # achieve database connection
+        # borrow database connection from the pool
         try:
-            db = mysql.connector.connect(
-                host=self.host_data,
-                user=self.user_data,
-                password=self.password_data,
-                database=self.database_data
-            )
+            db = self.pool.get_connection()
             return db
         
-        except mysql.connector.errors.ProgrammingError as perr:
+        except mysql.connector.Error as perr:
             self.logger.log("Connection not achieved", "ERROR")
-            self.logger.log(f"Error message: '{perr}'", "ERROR")
+            self.logger.log("Error message: '%s'", "ERROR", perr)
             return False
 
     def update_tables(self):
@@ -89,10 +88,11 @@ class TableInitializer:
         if connected:
             self.logger.log("Connection achieved", "DEBUG")
             server_info = database.get_server_info()
-            self.logger.log(f"Server info: {server_info}", "DEBUG")
+            self.logger.log("Server info: %s", "DEBUG", server_info)
 
             cursor = database.cursor()
             to_execute = []
+            to_seed = []
             found_tables = []
 
             # get the list of already existing tables
@@ -100,30 +100,97 @@ class TableInitializer:
             for data in cursor:
                 found_tables.append(data[0])
             
-            self.logger.log(f"Currently existing tables: {found_tables}", "DEBUG")
+            self.logger.log("Currently existing tables: %s", "DEBUG", found_tables)
 
             # check if all necessary tables are present in the database
             for table in self.tables:
                 if table.lower() not in found_tables:
-                    self.logger.log(f"Table {table} not found in existing tables", "DEBUG")
-                    add_table = self.standard_tables[table]
+                    self.logger.log("Table %s not found in existing tables", "DEBUG", table)
+                    # config lists tables in lowercase, definitions are capitalized
+                    add_table = {name.lower(): ddl for name, ddl in self.standard_tables.items()}[table.lower()]
                     to_execute.append(add_table)
 
+                    seed = {name.lower(): query for name, query in self.seed_queries.items()}.get(table.lower())
+                    if seed is not None:
+                        to_seed.append(seed)
+
             # if any tables are missing - create them
             if not len(to_execute) == 0:
                 for query in to_execute:
                     cursor.execute(query)
 
-                self.logger.log("Tables created, disconnecting from database", "DEBUG")
+                self.logger.log("Tables created", "DEBUG")
             else:
-                self.logger.log("All tables present, disconnecting from database", "DEBUG")
-            # terminate database connection
-            database.disconnect()
+                self.logger.log("All tables present", "DEBUG")
+
+            self.migrate(cursor)
+            self.logger.log("Migrations checked", "DEBUG")
+
+            # seeded after all tables exist and are migrated, as they are filled from the other ones
+            self._seed_tables(cursor, to_seed)
+            database.commit()
+            self.logger.log("Disconnecting from database", "DEBUG")
+
+            # return database connection to the pool
+            database.close()
             return True
 
         else:
             self.logger.log("Connection broken/not established, unable to proceed", "ERROR")
 
+    def migrate(self, cursor):
+        # bring tables created by older versions up to date - columns first, as indexes can depend on them
+        self._update_columns(cursor)
+        self._update_indexes(cursor)
+
+    def _seed_tables(self, cursor, queries):
+
+        for query in queries:
+            try:
+                cursor.execute(query)
+            except mysql.connector.Error as merr:
+                # derived table stays empty, summaries are then incomplete until it is refilled
+                self.logger.log("Couldn't fill derived table", "ERROR")
+                self.logger.log("Error message: '%s'", "ERROR", merr)
+                continue
+
+            self.logger.log("Derived table filled", "DEBUG")
+
+    def _update_columns(self, cursor):
+
+        for table, columns in self.standard_columns.items():
+            cursor.execute(f"SHOW COLUMNS FROM {table}")
+            found_columns = {data[0].lower() for data in cursor.fetchall()}
+
+            for column, query in columns.items():
+                if column.lower() in found_columns:
+                    continue
+
+                self.logger.log("Column %s not found in table %s, adding", "DEBUG", column, table)
+                cursor.execute(query)
+
+    def _update_indexes(self, cursor):
+
+        for table, indexes in self.standard_indexes.items():
+            # get the list of already existing indexes of the table, and columns they start with
+            cursor.execute(f"SHOW INDEX FROM {table}")
+            index_data = cursor.fetchall()
+            found_indexes = {data[2] for data in index_data}
+            leading_columns = {data[4].lower() for data in index_data if data[3] == 1}
+
+            for index, (columns, unique) in indexes.items():
+                if index in found_indexes or (not unique and columns[0].lower() in leading_columns):
+                    continue
+
+                self.logger.log("Index %s not found on table %s, creating", "DEBUG", index, table)
+                query = f"ALTER TABLE {table} ADD {'UNIQUE ' if unique else ''}INDEX {index} ({', '.join(columns)})"
+                try:
+                    cursor.execute(query)
+                except mysql.connector.Error as merr:
+                    # unique index can't be created while duplicated keys exist in the table
+                    self.logger.log("Couldn't create index %s on table %s", "ERROR", index, table)
+                    self.logger.log("Error message: '%s'", "ERROR", merr)
+
 
 if __name__ == "__main__":
     from Logger import Logger
@@ -0,0 +1,141 @@
+import os
+import gzip
+import json
+import argparse
+from Logger import levels, level_index
+from LogArchive import LogArchive, index_path
+
+# stream-filter structured (JSON lines) logfiles from debug/ directory, ex.:
+#   python log_query.py --level ERROR --days 1
+#   python log_query.py --project FOO --issue FOO-123 --text
+#   python log_query.py --code 2301 --count
+# WARNING and above / error code queries are served from sidecar index without scanning logfiles,
+# logfiles are selected from the archive manifest, archived (gzipped) ones are read as well
+
+root_dir = os.path.dirname(__file__)
+
+
+def list_logfiles(rdir:str, days:int=None) -> list:
+    # logfiles ordered by date and index, optionally only those of the last number of days
+    return LogArchive.get(rdir).files_since(days)
+
+
+def open_logfile(path:str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def is_structured(path:str) -> bool:
+    with open_logfile(path) as file:
+        return file.read(1) == b"{"
+
+
+def matches(record:dict, level:str=None, code=None, project:str=None, issue:str=None, component:str=None) -> bool:
+    if level is not None:
+        # unknown levels are not comparable, they are always reported
+        record_index = level_index.get(record.get("level"))
+        if record_index is not None and record_index < level_index[level]:
+            return False
+    if code is not None and str(record.get("code")) != str(code):
+        return False
+    if project is not None and record.get("project") != project:
+        return False
+    if issue is not None and record.get("issue") != issue:
+        return False
+    if component is not None and record.get("component") != component:
+        return False
+    return True
+
+
+def _indexed_offsets(path:str, level:str=None, code=None) -> list:
+    # offsets of indexed records matching level and code, None when logfile has no index
+    idx = index_path(path)
+    if not os.path.exists(idx):
+        return None
+
+    offsets = []
+    with open(idx, "r") as index:
+        for line in index:
+            offset, entry = line.rstrip("\n").split(" ", 1)
+            record_level, record_code = entry.rsplit(" ", 1)
+            record_index = level_index.get(record_level)
+            if level is not None and record_index is not None and record_index < level_index[level]:
+                continue
+            if code is not None and record_code != str(code):
+                continue
+            offsets.append(int(offset))
+    return offsets
+
+
+def iter_records(path:str, level:str=None, code=None, project:str=None, issue:str=None, component:str=None):
+    # yields (raw line, record) of matching records, reading only indexed offsets when the query allows it
+    filters = {"level": level, "code": code, "project": project, "issue": issue, "component": component}
+
+    # only WARNING and above and records with code are indexed
+    offsets = None
+    if code is not None or (level is not None and level_index[level] >= level_index["WARNING"]):
+        offsets = _indexed_offsets(path, level, code)
+
+    with open_logfile(path) as file:
+        if offsets is not None:
+            lines = []
+            for offset in offsets:
+                file.seek(offset)
+                lines.append(file.readline())
+        else:
+            lines = file
+
+        # cheap substring check before parsing, values are serialized as plain ASCII JSON
+        needles = [json.dumps(value).encode() for value in (project, issue) if value is not None]
+        if code is not None:
+            needles.append(b'"code": ')
+
+        for line in lines:
+            if not all(needle in line for needle in needles):
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # partially written last line
+                continue
+            if matches(record, **filters):
+                yield line.rstrip(b"\n").decode(), record
+
+
+def query(rdir:str, days:int=None, **filters):
+    for path in list_logfiles(rdir, days):
+        if is_structured(path):
+            yield from iter_records(path, **filters)
+
+
+def format_text(record:dict) -> str:
+    context = " ".join(f"{field}={record[field]}" for field in ("project", "issue", "code") if field in record)
+    return f"{record.get('timestamp')} | {record.get('level')} | {record.get('component')} | " \
+           f"{record.get('message')}" + (f" [{context}]" if context else "")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Filter structured JiraScrapper logs")
+    parser.add_argument("--level", choices=levels, help="minimal level of records")
+    parser.add_argument("--code", help="error code, see errorCodes.md")
+    parser.add_argument("--project", help="project key")
+    parser.add_argument("--issue", help="issue key")
+    parser.add_argument("--component", help="logging module, ex. structs or DBHandler")
+    parser.add_argument("--days", type=int, help="only logfiles of the last number of days")
+    parser.add_argument("--text", action="store_true", help="print records as text instead of JSON lines")
+    parser.add_argument("--count", action="store_true", help="print only number of matching records")
+    args = parser.parse_args()
+
+    found = 0
+    for raw, record in query(root_dir,
+                             days=args.days,
+                             level=args.level,
+                             code=args.code,
+                             project=args.project,
+                             issue=args.issue,
+                             component=args.component):
+        found += 1
+        if not args.count:
+            print(format_text(record) if args.text else raw)
+
+    if args.count:
+        print(found)
@@ -1,63 +1,255 @@
 from jira import JIRA, Issue, JIRAError
-from typing import Protocol
+import sys
+import threading
+from array import array
+from itertools import islice
+from typing import Protocol, Callable
+from collections import OrderedDict
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from EpicCache import EpicCache
+from FieldRegistry import FieldRegistry
 
 
 class Logger(Protocol):
-    def log(self, message, level):
+    def log(self, message, level, *args, **context):
         pass
 
 
 class TestTypeIssue:
+    # slots instead of __dict__ - issue record holds only its data, no logger reference
+    __slots__ = ("key", "test_type", "channel", "tester", "time", "version")
 
     def __init__(self,
-                 logger: Logger,
                  key:str,
                  test_type:str, 
                  channel:str, 
                  tester:str, 
-                 time:int,
+                 time:float,
                  version:str) -> None:
         
-        self.l = logger
         self.key = key
         self.test_type = test_type
         self.channel = channel
         self.tester = tester
         self.time = time
         self.version = version
-        self.l.log(f"Initialized Issue {self.key}", "DEBUG")
 
     def get_specs(self) -> dict:
-        self.l.log(f"Returning all data for Issue {self.key}", "DEBUG")
-        return vars(self)
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class IssueBatch:
+    # columnar container of issues - keys and test types are kept in lists, times in float array,
+    # channel, tester and version as indexes into tables of interned values, as those repeat a lot
+    columns = TestTypeIssue.__slots__
+    coded_columns = ("channel", "tester", "version")
+
+    def __init__(self) -> None:
+        self.keys = []
+        self.test_types = []
+        self.times = array('f')
+        self.codes = {column: array('I') for column in self.coded_columns}
+        self.values = {column: [] for column in self.coded_columns}
+        self._lookup = {column: {} for column in self.coded_columns}
+
+    def _encode(self, column:str, value:str) -> int:
+        lookup:dict = self._lookup[column]
+        code = lookup.get(value)
+        if code is None:
+            code = len(self.values[column])
+            value = sys.intern(value) if isinstance(value, str) else value
+            self.values[column].append(value)
+            lookup[value] = code
+        return code
+
+    def append(self, key:str, test_type:str, channel:str, tester:str, time:float, version:str) -> None:
+        self.keys.append(key)
+        self.test_types.append(test_type)
+        self.times.append(time)
+        self.codes["channel"].append(self._encode("channel", channel))
+        self.codes["tester"].append(self._encode("tester", tester))
+        self.codes["version"].append(self._encode("version", version))
+
+    def add(self, issue:TestTypeIssue) -> None:
+        self.append(issue.key, issue.test_type, issue.channel, issue.tester, issue.time, issue.version)
+
+    def column(self, name:str) -> list:
+        match name:
+            case "key":
+                return self.keys
+            case "test_type":
+                return self.test_types
+            case "time":
+                # float32 storage, values are rounded back to the precision they were gathered with
+                return [round(time, 1) for time in self.times]
+            case _:
+                values = self.values[name]
+                return [values[code] for code in self.codes[name]]
+
+    def rows(self):
+        # yield plain tuples in order of IssueBatch.columns, without building objects per row
+        channels = self.values["channel"]
+        testers = self.values["tester"]
+        versions = self.values["version"]
+
+        for i in range(len(self.keys)):
+            yield (self.keys[i],
+                   self.test_types[i],
+                   channels[self.codes["channel"][i]],
+                   testers[self.codes["tester"][i]],
+                   round(self.times[i], 1),
+                   versions[self.codes["version"][i]])
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __getitem__(self, index:int) -> TestTypeIssue:
+        return TestTypeIssue(self.keys[index],
+                             self.test_types[index],
+                             self.values["channel"][self.codes["channel"][index]],
+                             self.values["tester"][self.codes["tester"][index]],
+                             round(self.times[index], 1),
+                             self.values["version"][self.codes["version"][index]])
+
+    def __iter__(self):
+        for row in self.rows():
+            yield TestTypeIssue(*row)
+
+
+class EpicStore:
+    # resolved epics (self.epics) and their info - software version and distribution channel (self.parents)
+    # when max_entries is set, the least recently added epics are dropped first
+    # store can be evicted by another project at any time, so it is only accessed through its methods
+
+    def __init__(self, max_entries:int=None) -> None:
+        self.epics = OrderedDict()
+        self.parents = {}
+        self.max_entries = max_entries
+        # store can be shared by concurrently scraped projects
+        self._lock = threading.Lock()
+
+    def add(self, epic:Issue) -> None:
+        with self._lock:
+            self.epics[epic.key] = epic
+            self.epics.move_to_end(epic.key)
+            if epic.key not in self.parents:
+                # create empty dict to store parent info - distribution channel and software version
+                self.parents[epic.key] = {}
+
+            while self.max_entries is not None and len(self.epics) > self.max_entries:
+                evicted, _ = self.epics.popitem(last=False)
+                self.parents.pop(evicted, None)
+
+    def __contains__(self, key:str) -> bool:
+        with self._lock:
+            return key in self.epics
+
+    def get(self, key:str) -> Issue:
+        with self._lock:
+            return self.epics.get(key)
+
+    def get_info(self, key:str, field:str):
+        # parent info of epic, None when unknown or the epic was evicted
+        with self._lock:
+            return self.parents.get(key, {}).get(field)
+
+    def set_info(self, key:str, field:str, value) -> None:
+        # info of evicted epics is not stored, it would never be evicted again
+        with self._lock:
+            if key in self.epics:
+                self.parents[key][field] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self.epics.clear()
+            self.parents.clear()
+
+
+class ProjectContext:
+    # state of a single project scrape - issue buffer (columnar IssueBatch), epic store and errors
+    # issues are handed over to on_flush callback every flush_size issues (if set), release() drops
+    # everything held by the context, except errors which are kept for reporting
+
+    def __init__(self,
+                 key:str,
+                 epics:EpicStore=None,
+                 on_flush:Callable=None,
+                 flush_size:int=0) -> None:
+        self.key = key
+        self.issues = IssueBatch()
+        self.errors = {}
+        self.flushed = 0
+        self.on_flush = on_flush
+        self.flush_size = flush_size
+        # shared store has to be passed explicitly, otherwise epics live only as long as the context
+        self._shared_epics = epics is not None
+        self.epics = epics if epics is not None else EpicStore()
+
+    def add_issue(self, issue:TestTypeIssue) -> None:
+        self.issues.add(issue)
+        if self.flush_size > 0 and len(self.issues) >= self.flush_size:
+            self.flush()
+
+    def flush(self) -> int:
+        if self.on_flush is None or len(self.issues) == 0:
+            return 0
+
+        count = len(self.issues)
+        self.on_flush(self.key, self.issues)
+        self.issues = IssueBatch()
+        self.flushed += count
+        return count
+
+    def release(self) -> None:
+        self.flush()
+        self.issues = IssueBatch()
+        if not self._shared_epics:
+            self.epics.clear()
 
 
 class Project:
-    project_issues = []
-    parents = {}
-    errors = {}
+    epic_chunk_size = 50
+    # fields requested for epics - summary holds the software version, links point to SuperEpic
+    epic_fields = ["summary", "issuelinks"]
 
     def __init__(self,
                  logger:Logger,
                  jira:JIRA,
                  key:str,
                  developers_dict:dict,
-                 projects_dict:dict) -> None:
+                 projects_dict:dict,
+                 workers:int=1,
+                 epic_cache:EpicCache=None,
+                 fields:FieldRegistry=None,
+                 context:ProjectContext=None) -> None:
         self.l = logger
         self.key = key
         self.j = jira
         self.developer = None
         self.name = None
-        self.l.log(f"Initialization of project {self.key}", "RUN")
+        # number of parallel Jira requests this project is allowed to make
+        self.workers = max(1, workers)
+        # optional persistent cache of epics, shared between runs
+        self.epic_cache = epic_cache
+        # issues, epics and errors are held by the context of this project scrape
+        if context is None:
+            context = ProjectContext(key)
+        self.context = context
+        # newest 'updated' timestamp (UTC) seen during iteration, used by incremental sync
+        self.max_updated = None
+        self.l.log("Initialization of project %s", "RUN", self.key)
 
         def check_main_errors_dict():
             check_main = self.errors.get('main')
             if check_main is None:
                 self.errors['main'] = []
 
-        # create nameMap to easily access custom fields returned form Jira
-        allfields = self.j.fields()
-        self.nameMap = {field['name']:field['id'] for field in allfields}
+        # registry to easily access custom fields returned form Jira - shared one should be passed
+        # from JiraHandler, otherwise metadata is fetched for this project only
+        if fields is None:
+            fields = FieldRegistry(self.l, self.j)
+        self.fields = fields
 
         # get developer associated with project
         for developer, proj_list in developers_dict.items():
@@ -66,18 +258,20 @@ class Project:
 
         #log results
         if self.developer is not None:
-            self.l.log(f"Developer {self.developer} assigned to project {self.key}", "DEBUG")
+            self.l.log("Developer %s assigned to project %s", "DEBUG", self.developer, self.key)
         else:
             check_main_errors_dict()
             self.errors["main"].append(2101)
-            self.l.log(f"No matching developer found for project {self.key}!", "ERROR")
+            self.l.log("No matching developer found for project %s!", "ERROR", self.key,
+                       project=self.key, code=2101)
             self.developer = "Unknown"
         
         # check if project is present in config file
         if self.key not in projects_dict.keys():
             check_main_errors_dict()
             self.errors["main"].append(2102)
-            self.l.log(f"Project with the key {self.key} is not present in the configuration file", "ERROR")
+            self.l.log("Project with the key %s is not present in the configuration file", "ERROR", self.key,
+                       project=self.key, code=2102)
             
 
         # get full name of the project
@@ -87,12 +281,25 @@ class Project:
 
         # log results
         if self.name is not None:
-            self.l.log(f"Name {self.name} associated with project {self.key}", "DEBUG")
+            self.l.log("Name %s associated with project %s", "DEBUG", self.name, self.key)
         else:
             check_main_errors_dict()
             self.errors["main"].append(2103)
-            self.l.log(f"No matching name found for project {self.key}!", "ERROR")
+            self.l.log("No matching name found for project %s!", "ERROR", self.key,
+                       project=self.key, code=2103)
     
+    @property
+    def project_issues(self) -> IssueBatch:
+        return self.context.issues
+
+    @property
+    def errors(self) -> dict:
+        return self.context.errors
+
+    @property
+    def epics(self) -> EpicStore:
+        return self.context.epics
+
     def _add_error(self, epicKey:str, issueKey:str, errorCode:int):
 
         if self.errors.get(epicKey) is None:
@@ -102,26 +309,93 @@ class Project:
         if errorCode not in self.errors[epicKey][issueKey]:
             self.errors[epicKey][issueKey].append(errorCode)
 
-    def _get_parent(self, issueKey) -> Issue:
+    def _add_epic(self, epic:Issue) -> None:
+        self.epics.add(epic)
+        if self.epics.get_info(epic.key, "softVersion") is None:
+            self.epics.set_info(epic.key, "softVersion", epic.fields.summary.split(" ")[0])
+
+    def _search_chunks(self, keys:list, fields:list) -> list:
+        # fetch issues with given keys using a single "key in (...)" query per chunk
+        def fetch_chunk(chunk:list) -> list:
+            jql_search = f'''key in ({", ".join(chunk)})'''
+
+            try:
+                return self.j.search_issues(jql_str=jql_search, maxResults=len(chunk), fields=fields)
+            except JIRAError as jerr:
+                # leave the chunk unresolved, _get_parent falls back to single requests
+                self.l.log("Error when resolving parents %s in project %s: %s", "ERROR", chunk, self.key, jerr, project=self.key)
+                return []
+
+        chunks = [keys[i:i + self.epic_chunk_size] for i in range(0, len(keys), self.epic_chunk_size)]
+
+        if self.workers > 1 and len(chunks) > 1:
+            # map keeps the order of chunks, so results are merged deterministically
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(chunks))) as executor:
+                results = list(executor.map(fetch_chunk, chunks))
+        else:
+            results = [fetch_chunk(chunk) for chunk in chunks]
+
+        return [issue for result in results for issue in result]
+
+    def _resolve_parents(self, issues:list) -> None:
+        # collect distinct parent keys of the search page and fetch all unknown epics
+        # with a single "key in (...)" query per chunk, instead of one call per issue
+        parentKeys = []
+        for singleIssue in issues:
+            issueParent = getattr(singleIssue.fields, "parent", None)
+            if issueParent is not None and issueParent.key not in self.epics and issueParent.key not in parentKeys:
+                parentKeys.append(issueParent.key)
+
+        self.l.log("Resolving %s new parents for project %s", "DEBUG", len(parentKeys), self.key)
+
+        if self.epic_cache is not None and len(parentKeys) > 0:
+            fresh, stale = self.epic_cache.get_many(parentKeys)
+
+            if len(stale) > 0:
+                # cheap revalidation - only 'updated' timestamps of stale epics are requested
+                current = {epic.key: epic.fields.updated for epic in self._search_chunks(list(stale.keys()), ["updated"])}
+                unchanged = [key for key, raw in stale.items() if current.get(key) == raw['fields'].get('updated')]
+                changed = [key for key in stale if key not in unchanged]
+                self.epic_cache.revalidate(unchanged, changed)
+                for key in unchanged:
+                    fresh[key] = stale[key]
+
+            for raw in fresh.values():
+                self._add_epic(Issue(self.j._options, self.j._session, raw=raw))
+
+            parentKeys = [key for key in parentKeys if key not in fresh]
+            self.l.log("%s parents read from epic cache, %s to be fetched", "DEBUG", len(fresh), len(parentKeys))
+
+        epics = self._search_chunks(parentKeys, self.epic_fields + ["updated"])
+        for epic in epics:
+            self._add_epic(epic)
+
+        if self.epic_cache is not None and len(epics) > 0:
+            self.epic_cache.put_many([epic.raw for epic in epics])
+
+    def _get_parent(self, issue:Issue) -> Issue:
+        issueKey = issue.key
         try:
 
-            self.l.log(f"Starting search for parent of issue {issueKey}", "DEBUG")
-            issue = self.j.issue(issueKey)
+            self.l.log("Starting search for parent of issue %s", "DEBUG", issueKey)
             issueParent = issue.get_field("parent")
             parentKey = issueParent.key
-            epic = self.j.issue(parentKey)
-            self.l.log(f"Parent key found: {epic.key}", "DEBUG")
+            epic = self.epics.get(parentKey)
 
-            if epic.key not in self.parents:
-                # create empty dict to store parent info - distribution channel and software version
-                self.parents[epic.key] = {}
+            if epic is None:
+                # parent was not resolved by the batched stage
+                epic = self.j.issue(parentKey, fields=",".join(self.epic_fields))
+                self.epics.add(epic)
+
+            self.l.log("Parent key found: %s", "DEBUG", epic.key)
 
             return epic
         
-        except JIRAError as jerr:
+        except (JIRAError, AttributeError) as jerr:
 
             self._add_error("Unknown", issueKey, 2301)
-            self.l.log(f"Error when getting parent of issue {issueKey} in project {self.key}: {jerr}", "ERROR")
+            self.l.log("Error when getting parent of issue %s in project %s: %s", "ERROR", issueKey, self.key, jerr,
+                       project=self.key, issue=issueKey, code=2301)
             
             return None
 
@@ -131,34 +405,32 @@ class Project:
 
         if epic is None:
 
-            self.l.log(f"Can't find proper distribution channel due to lack of parent of issue {issueKey}", "ERROR")
+            self.l.log("Can't find proper distribution channel due to lack of parent of issue %s", "ERROR", issueKey,
+                       project=self.key, issue=issueKey, code=2401)
             self._add_error("Unknown", issueKey, 2401)
 
             return None
         
-        self.l.log(f"Checking if {parent.key} is present in self.parents", "DEBUG")
-
-        if epic.key in self.parents:
+        self.l.log("Checking if %s is present in self.parents", "DEBUG", parent.key)
 
-            epicdict:dict = self.parents[epic.key]
-            chan_type = epicdict.get("channelType")
+        chan_type = self.epics.get_info(epic.key, "channelType")
 
-            if chan_type is not None:
+        if chan_type is not None:
 
-                self.l.log(f"Epic {epic.key} found, channel is {chan_type}", "DEBUG")
-                channeltype = chan_type
+            self.l.log("Epic %s found, channel is %s", "DEBUG", epic.key, chan_type)
+            channeltype = chan_type
 
-                return channeltype
+            return channeltype
         
         else:
 
-            self.l.log(f"Epic {epic.key} not in parents, or does not have associated channel type", "DEBUG")
+            self.l.log("Epic %s not in parents, or does not have associated channel type", "DEBUG", epic.key)
 
         superEpicKey = None
         channeltype = None
         inwardIssue_found = False
         
-        self.l.log(f"Iterating over linked issues of epic {epic.key}", "DEBUG")
+        self.l.log("Iterating over linked issues of epic %s", "DEBUG", epic.key)
 
         for i in range(len(epic.fields.issuelinks)):
 
@@ -167,41 +439,45 @@ class Project:
             if 'inwardIssue' in linkedIssueDict.keys():
 
                 inwardIssue_found = True
-                self.l.log(f"Found inward linked issue", "DEBUG")
+                self.l.log("Found inward linked issue", "DEBUG")
                 linkedIssueType = linkedIssueDict['inwardIssue']['fields']['issuetype']['name']
 
                 if linkedIssueType == "SuperEpic":
 
-                    self.l.log(f"Inward linked issue is confirmed as SuperEpic", "DEBUG")
+                    self.l.log("Inward linked issue is confirmed as SuperEpic", "DEBUG")
                     superEpicKey = linkedIssueDict['inwardIssue']['key']
-                    superEpic = self.j.issue(superEpicKey)
-                    channeltype = superEpic.fields.summary
-                    self.parents[epic.key]["channelType"] = channeltype
+                    # linked issue payload already carries the SuperEpic summary, no need to fetch it
+                    channeltype = linkedIssueDict['inwardIssue']['fields'].get('summary')
+                    if channeltype is None:
+                        channeltype = self.j.issue(superEpicKey, fields="summary").fields.summary
+                    self.epics.set_info(epic.key, "channelType", channeltype)
 
                     return channeltype
             
         if inwardIssue_found == False:
-            self.l.log(f"Epic {parent.key} has no valid SuperEpic links", "ERROR")
+            self.l.log("Epic %s has no valid SuperEpic links", "ERROR", parent.key,
+                       project=self.key, issue=issueKey, code=2402)
             self._add_error(parent.key, issueKey, 2402)
             
         if superEpicKey is None or channeltype is None:
 
-            self.l.log(f"Can't find proper distribution channel for issue {issueKey} and epic {epic.key}", "ERROR")
+            self.l.log("Can't find proper distribution channel for issue %s and epic %s", "ERROR", issueKey, epic.key,
+                       project=self.key, issue=issueKey, code=2403)
             self._add_error(parent.key, issueKey, 2403)
             
             return None
 
-    def _get_tester(self, issueKey) -> str:
+    def _get_tester(self, issue:Issue) -> str:
 
-        self.l.log(f"Starting search for tester assigned to issue {issueKey}", "DEBUG")
-        issue = self.j.issue(issueKey)
+        issueKey = issue.key
+        self.l.log("Starting search for tester assigned to issue %s", "DEBUG", issueKey)
 
         try:
 
-            userlist = getattr(issue.fields, self.nameMap["Approvers"])
+            userlist = getattr(issue.fields, self.fields.get_id("Approvers"))
             user = userlist[0]
             tester = user.displayName
-            self.l.log(f"Tester {tester} found assigned to issue {issueKey}", "DEBUG")
+            self.l.log("Tester %s found assigned to issue %s", "DEBUG", tester, issueKey)
             
             return tester
         
@@ -209,80 +485,137 @@ class Project:
             issueParent = issue.get_field("parent")
             parentKey = issueParent.key
             self._add_error(parentKey, issueKey, 2501)
-            self.l.log(f"No name found for tester in issue {issueKey}", "ERROR")
+            self.l.log("No name found for tester in issue %s", "ERROR", issueKey,
+                       project=self.key, issue=issueKey, code=2501)
             
             return None
 
-    def gather_issues(self, limit:int=500):
-        self.l.log(f"Starting gathering of max {limit} issues for project {self.key}", "DEBUG")
-        issues = []
+    def _search_pages(self, jql_search:str, search_fields:list, page_size:int):
+        # yield search results page by page - token based pagination is used when
+        # the jira client supports it, classic startAt pagination otherwise
+        if hasattr(self.j, "enhanced_search_issues"):
+            nextPageToken = None
+            while True:
+                page = self.j.enhanced_search_issues(jql_str=jql_search,
+                                                     nextPageToken=nextPageToken,
+                                                     maxResults=page_size,
+                                                     fields=search_fields)
+                if len(page) > 0:
+                    yield list(page)
+
+                nextPageToken = getattr(page, "nextPageToken", None)
+                if nextPageToken is None or len(page) == 0:
+                    return
+        else:
+            startAt = 0
+            while True:
+                page = self.j.search_issues(jql_str=jql_search,
+                                            startAt=startAt,
+                                            maxResults=page_size,
+                                            fields=search_fields)
+                if len(page) == 0:
+                    return
+
+                yield list(page)
+
+                startAt += len(page)
+                if startAt >= page.total:
+                    return
+
+    def _track_updated(self, issue:Issue) -> None:
+        updated = getattr(issue.fields, "updated", None)
+        if updated is None:
+            return
+
+        # Jira returns e.g. 2023-10-05T12:31:45.000+0200, watermarks are kept in naive UTC
+        updated = datetime.strptime(updated, "%Y-%m-%dT%H:%M:%S.%f%z").astimezone(timezone.utc).replace(tzinfo=None)
+        if self.max_updated is None or updated > self.max_updated:
+            self.max_updated = updated
+
+    def iter_issues(self, page_size:int=100, updated_since:datetime=None, overlap:int=5):
+        self.l.log("Starting paged iteration over issues of project %s, page size %s", "DEBUG", self.key, page_size)
 
         jql_search = f'''project="{self.key}" AND issuetype = "Test Type"'''
 
-        # appending to list and then interating over the issues contained in that list is 30% faster
+        if updated_since is not None:
+            # relative JQL date avoids any dependency on the timezone of the Jira user,
+            # overlap re-scans a few minutes before the watermark to not miss concurrent updates
+            minutes = int((datetime.now(timezone.utc).replace(tzinfo=None) - updated_since).total_seconds() // 60) + overlap
+            jql_search += f''' AND updated >= "-{minutes}m"'''
+            self.l.log("Incremental iteration, issues updated since %s UTC", "DEBUG", updated_since)
+
+        # oldest changes first - pass cut by the limit then misses only issues newer than max_updated,
+        # so the watermark can be advanced safely
+        jql_search += ''' ORDER BY updated ASC, key ASC'''
+
+        # request only the fields used below, so issues never have to be fetched again
+        search_fields = ["summary", "aggregatetimespent", "parent", "updated"]
+        approvers = self.fields.get_id("Approvers")
+        if approvers is not None:
+            search_fields.append(approvers)
+
+        # appending page to list and then interating over the issues contained in that list is 30% faster
         # than commencing any operations in the search_issues for loop
-        for singleIssue in self.j.search_issues(jql_str=jql_search, maxResults=limit):
-            issues.append(singleIssue)
-        
-        for singleIssue in issues:
-            issueKey = singleIssue.key
-            issueName = singleIssue.fields.summary
-            aggregateTime = singleIssue.raw['fields']['aggregatetimespent']
+        for page in self._search_pages(jql_search, search_fields, page_size):
+            self._resolve_parents(page)
 
-            if aggregateTime is None:
-                aggregateTime = 0
+            for singleIssue in page:
+                issueKey = singleIssue.key
+                self._track_updated(singleIssue)
+                issueName = singleIssue.fields.summary
+                aggregateTime = singleIssue.raw['fields']['aggregatetimespent']
 
-            issueTime = round((int(aggregateTime) / 3600), 1)  # divide the aggregated time (which is in seconds) by 3600 to get hours and round to 1 decimal digit
-            parentIssue = self._get_parent(issueKey)
+                if aggregateTime is None:
+                    aggregateTime = 0
 
-            # check if parent issue in self.parents
-            if parentIssue is not None and parentIssue.key in self.parents:
+                issueTime = round((int(aggregateTime) / 3600), 1)  # divide the aggregated time (which is in seconds) by 3600 to get hours and round to 1 decimal digit
+                parentIssue = self._get_parent(singleIssue)
 
-                epicdict:dict = self.parents[parentIssue.key]
-                softver = epicdict.get("softVersion")
-                if softver is not None:
-                    softVersion = softver
+                # check if parent issue info is in self.parents
+                if parentIssue is not None:
 
-                else:
-                    parent_summary = parentIssue.fields.summary
-                    softVersion = parent_summary.split(" ")[0]
-                    self.parents[parentIssue.key]["softVersion"] = softVersion
-                
-                distributionChannel = self._get_channel(issueKey, parentIssue)
-                if distributionChannel is None:
-                    distributionChannel = "Unknown"
-                
+                    softVersion = self.epics.get_info(parentIssue.key, "softVersion")
+                    if softVersion is None:
+                        parent_summary = parentIssue.fields.summary
+                        softVersion = parent_summary.split(" ")[0]
+                        self.epics.set_info(parentIssue.key, "softVersion", softVersion)
 
-            elif parentIssue is not None:
-                parent_summary = parentIssue.fields.summary
-                softVersion = parent_summary.split(" ")[0]
-                self.parents[parentIssue.key]["softVersion"] = softVersion
+                    distributionChannel = self._get_channel(issueKey, parentIssue)
+                    if distributionChannel is None:
+                        distributionChannel = "Unknown"
 
-                distributionChannel = self._get_channel(issueKey, parentIssue)
-                if distributionChannel is None:
+                else:
+                    softVersion = "Unknown"
                     distributionChannel = "Unknown"
-
-            else:
-                softVersion = "Unknown"
-                distributionChannel = "Unknown"
-            
-            issueApprover = self._get_tester(issueKey)
-            if issueApprover is None:
-                issueApprover = "Unknown"
-
-            self.l.log(f"Creating new issue {issueKey}, type: {issueName}, channel: {distributionChannel}, tester: {issueApprover}", "DEBUG")
-            newIssue = TestTypeIssue(logger=self.l,
-                             key=issueKey,
-                             test_type=issueName,
-                             channel=distributionChannel,
-                             tester=issueApprover,
-                             time=issueTime,
-                             version=softVersion)
             
-            self.l.log(f"Appending issue {issueKey} to project's {self.key} issues list", "DEBUG")
-            self.project_issues.append(newIssue)
+                issueApprover = self._get_tester(singleIssue)
+                if issueApprover is None:
+                    issueApprover = "Unknown"
+
+                self.l.log("Creating new issue %s, type: %s, channel: %s, tester: %s", "DEBUG",
+                       issueKey, issueName, distributionChannel, issueApprover, project=self.key, issue=issueKey)
+                newIssue = TestTypeIssue(key=issueKey,
+                                 test_type=issueName,
+                                 channel=distributionChannel,
+                                 tester=issueApprover,
+                                 time=issueTime,
+                                 version=softVersion)
+
+                yield newIssue
+
+    def gather_issues(self, limit:int=500, updated_since:datetime=None):
+        self.l.log("Starting gathering of max %s issues for project %s", "DEBUG", limit, self.key)
+        gathered = 0
+
+        # islice stops before asking for the next issue, so no page over the limit is searched and resolved
+        for newIssue in islice(self.iter_issues(page_size=min(limit, 100), updated_since=updated_since), limit):
+            self.l.log("Appending issue %s to project's %s issues list", "DEBUG", newIssue.key, self.key)
+            self.context.add_issue(newIssue)
+            gathered += 1
+
+        # hand over the rest of buffered issues, no-op when context has no flush callback
+        self.context.flush()
         
-        self.l.log(f"Project {self.key} contains {len(self.project_issues)} issues", "RUN")
+        self.l.log("Project %s contains %s issues", "RUN", self.key, gathered, project=self.key)
         
         return self.project_issues
-